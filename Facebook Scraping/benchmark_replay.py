@@ -0,0 +1,128 @@
+"""
+Benchmark the post scraper offline by replaying saved page snapshots.
+
+Pages saved with RECORD_SNAPSHOTS = True in individual_post_scraper.py are
+served by SnapshotReplayer to a fresh headless browser, so no network or
+Facebook login is needed and every run sees exactly the same pages. Every
+snapshot is scraped once per pool size given on the command line; the
+extracted post text and comments are checked against the ones recorded
+live, then throughput and per-stage timings are reported. Each pool size
+runs once per comment source: "graphql" reads the recorded GraphQL
+responses, which the replayer embeds in the served page. The recorded
+responses are parsed on their own as well to time the GraphQL comment parser.
+
+Usage: python "Facebook Scraping/benchmark_replay.py" [pool sizes...]
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from playwright.async_api import async_playwright
+
+import individual_post_scraper as scraper
+from graphql_comments import parse_embedded_comments, parse_graphql_payload
+from page_snapshots import SNAPSHOTS_DIR, SnapshotReplayer, list_snapshots, load_snapshot
+from scrape_metrics import MetricsLog, print_stage_summary
+
+DEFAULT_POOL_SIZES = [1, 2, 4]
+COMMENT_SOURCES = ["dom", "graphql"]
+
+def configure_for_replay():
+    """Drop the pauses that only exist to go easy on Facebook."""
+    scraper.WAIT_MODE = "adaptive"
+    scraper.POST_DELAY_SECONDS = 0
+    scraper.COMMENT_SETTLE_TIMEOUT_MS = 200
+    scraper.PAGE_READY_TIMEOUT_MS = 2000
+
+async def replay(replayer: SnapshotReplayer, pool_size: int) -> Tuple[List[Dict], float, List[Dict]]:
+    """
+    Scrape every snapshot once with a pool of tabs.
+
+    Returns:
+        Tuple of (scrape results, wall-clock seconds, metrics records)
+    """
+    metrics_log = MetricsLog(os.devnull)
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context()
+        await replayer.install(context)
+
+        start = time.perf_counter()
+        results = await scraper.scrape_posts_with_context(context, replayer.urls, pool_size, metrics_log=metrics_log)
+        seconds = time.perf_counter() - start
+
+        await browser.close()
+    return results, seconds, metrics_log.records
+
+def count_mismatches(results: List[Dict], snapshots: Dict[str, str]) -> int:
+    """Count replayed posts whose text or comments differ from the live recording."""
+    mismatches = 0
+    for result in results:
+        expected = load_snapshot(snapshots[result["url"]])["result"]
+        if "error" in result:
+            print(f"❌ {result['url']} failed: {result['error']}")
+            mismatches += 1
+            continue
+        # Comments can only be compared with ones recorded from the same source
+        same_source = ("comment_records" in expected) == ("comment_records" in result)
+        if result["post_text"] != expected["post_text"] or (same_source and result["comments"] != expected["comments"]):
+            print(f"❌ {result['url']} differs from the recording")
+            mismatches += 1
+    return mismatches
+
+def benchmark_graphql_parsing(snapshots: Dict[str, str]):
+    """Time parsing the recorded GraphQL responses and embedded page JSON."""
+    loaded = [load_snapshot(directory) for directory in snapshots.values()]
+    bodies = [response["body"] for snapshot in loaded for response in snapshot["responses"]]
+    if not bodies:
+        print("No GraphQL responses recorded; skipping the parser benchmark")
+        return
+
+    start = time.perf_counter()
+    records = sum(len(parse_graphql_payload(body)) for body in bodies)
+    records += sum(len(parse_embedded_comments(snapshot["html"])) for snapshot in loaded)
+    seconds = time.perf_counter() - start
+
+    size = sum(len(body) for body in bodies) + sum(len(snapshot["html"]) for snapshot in loaded)
+    print(f"GraphQL parsing: {records:,} comment records from {size / 1024 / 1024:.1f} MB in {seconds:.2f}s "
+          f"({size / 1024 / 1024 / seconds:.1f} MB/s)")
+
+def main():
+    pool_sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_POOL_SIZES
+    snapshots = list_snapshots(SNAPSHOTS_DIR)
+    if not snapshots:
+        print(f"No snapshots in {SNAPSHOTS_DIR}.")
+        print("Set RECORD_SNAPSHOTS = True in individual_post_scraper.py and scrape some posts first.")
+        sys.exit(1)
+
+    configure_for_replay()
+    replayer = SnapshotReplayer(SNAPSHOTS_DIR)
+    print(f"Replaying {len(snapshots)} snapshots from {SNAPSHOTS_DIR}")
+
+    rows = []
+    mismatches = 0
+    for comment_source in COMMENT_SOURCES:
+        scraper.COMMENT_SOURCE = comment_source
+        for pool_size in pool_sizes:
+            results, seconds, records = asyncio.run(replay(replayer, pool_size))
+            mismatches += count_mismatches(results, snapshots)
+            rows.append((comment_source, pool_size, seconds, len(results)))
+            if pool_size == pool_sizes[0]:
+                print(f"\nComment source: {comment_source}")
+                print_stage_summary(records)
+
+    print(f"\n{'source':>8}{'tabs':>6}{'seconds':>10}{'posts/s':>10}")
+    for comment_source, pool_size, seconds, posts in rows:
+        print(f"{comment_source:>8}{pool_size:>6}{seconds:>10.2f}{posts / seconds:>10.2f}")
+
+    benchmark_graphql_parsing(snapshots)
+
+    if mismatches:
+        print(f"❌ {mismatches} replayed posts differ from their recordings")
+        sys.exit(1)
+    print("✅ Every replayed post matches its recording")
+
+if __name__ == "__main__":
+    main()
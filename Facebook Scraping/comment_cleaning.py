@@ -0,0 +1,193 @@
+import re
+from typing import List
+
+# Noise patterns in the order the cleaner has always applied them
+NOISE_PATTERNS = [
+    r'\n\d+[wdhms]\n',  # Remove time stamps with newlines
+    r'Like',
+    r'Reply',
+    r'Share',
+    r'See translation',
+    r'Edited',
+    r'Follow',
+    r'\n·\n',
+    r'^\s*·\s*',  # Remove leading dots
+    r'\s+·\s+Follow\s*$',  # Remove trailing "· Follow"
+]
+
+# Interface words removed anywhere in a comment, in lower case
+INTERFACE_WORDS = [pattern.lower() for pattern in NOISE_PATTERNS[1:7]]
+
+# Characters that match an interface word letter case-insensitively without
+# lower-casing to it, so lower-case matching can't be used on text holding them
+CASE_FOLD_EXCEPTIONS = ('\u0131', '\u017f')
+
+TIMESTAMP_PATTERN = re.compile(NOISE_PATTERNS[0], re.IGNORECASE)
+INTERFACE_WORD_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in NOISE_PATTERNS[1:7]]
+DOT_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in NOISE_PATTERNS[7:]]
+TIMESTAMP_LINE_PATTERN = re.compile(r'^\d+[wdhms]$')
+
+# Lines that are only interface elements
+INTERFACE_ELEMENTS = frozenset([
+    'like', 'reply', 'share', 'see translation', 'edited', 'follow',
+    '·', 'anonymous participant', 'likesee translation', 'likeshare',
+    'likereply', 'replyshare', 'likereplyshare', 'likesee translationedited'
+])
+
+# Interface elements that can trail a line
+INTERFACE_ENDINGS = [
+    'like', 'reply', 'share', 'see translation', 'edited', 'follow',
+    'likesee translation', 'likeshare', 'likereply', 'replyshare'
+]
+
+# Matches the longest interface ending at the start of a reversed line, so a
+# single match finds the ending that leaves the least content behind
+REVERSED_ENDINGS_PATTERN = re.compile("|".join(
+    re.escape(ending[::-1]) for ending in sorted(INTERFACE_ENDINGS, key=len, reverse=True)
+))
+
+def remove_interface_words(text: str) -> str:
+    """
+    Remove every interface word, matching case-insensitively.
+
+    The text is lower-cased once and each word is located with plain string
+    splitting, which is several times faster than case-insensitive regular
+    expressions on non-ASCII text. The words are removed in the same order as
+    NOISE_PATTERNS, so the result is the same as applying each pattern in turn.
+    """
+    lowered = text.lower()
+
+    # Lower-casing must keep every character in place for the offsets to line up
+    if len(lowered) != len(text) or any(char in text for char in CASE_FOLD_EXCEPTIONS):
+        for pattern in INTERFACE_WORD_PATTERNS:
+            text = pattern.sub('', text)
+        return text
+
+    for word in INTERFACE_WORDS:
+        if word not in lowered:
+            continue
+
+        pieces = lowered.split(word)
+        kept = []
+        position = 0
+        for piece in pieces:
+            kept.append(text[position:position + len(piece)])
+            position += len(piece) + len(word)
+
+        text = ''.join(kept)
+        lowered = ''.join(pieces)
+
+    return text
+
+def clean_comment_text(comment_text: str) -> str:
+    """
+    Clean Facebook comment text by removing interface elements and metadata.
+
+    Args:
+        comment_text: Raw comment text from Facebook
+
+    Returns:
+        Cleaned comment text
+    """
+    if not comment_text:
+        return ""
+
+    cleaned_text = comment_text
+    if '\n' in cleaned_text:
+        cleaned_text = TIMESTAMP_PATTERN.sub('', cleaned_text)
+
+    cleaned_text = remove_interface_words(cleaned_text)
+
+    # The remaining patterns all need a separator dot
+    if '·' in cleaned_text:
+        for pattern in DOT_PATTERNS:
+            cleaned_text = pattern.sub('', cleaned_text)
+
+    # Remove blank lines and lines that are just interface elements
+    filtered_lines = []
+    for line in cleaned_text.split('\n'):
+        line = line.strip()
+        if line and not is_interface_line(line):
+            filtered_lines.append(line)
+
+    # Separate username from comment content with tab
+    if len(filtered_lines) >= 2:
+        # First line is typically the username, rest is the comment
+        return f"{filtered_lines[0]}\t" + '\n'.join(filtered_lines[1:])
+    elif len(filtered_lines) == 1:
+        # Only one line - could be just username or username with short comment
+        return filtered_lines[0]
+    else:
+        return ""
+
+def is_interface_line(line: str) -> bool:
+    """
+    Check if a line is just Facebook interface text that should be removed.
+
+    Args:
+        line: A single line of text
+
+    Returns:
+        True if the line should be filtered out
+    """
+    # Check if line is very short and likely not meaningful content
+    if len(line) <= 3:
+        return True
+
+    line_lower = line.lower().strip()
+
+    # Check if line is only interface elements
+    if line_lower in INTERFACE_ELEMENTS:
+        return True
+
+    # Check for interface elements at the end of the line that leave little content
+    ending = REVERSED_ENDINGS_PATTERN.match(line_lower[::-1])
+    if ending and len(line_lower[:-ending.end()].strip()) < 5:
+        return True
+
+    # Check if line is just a time stamp (like "1w", "2d", etc.)
+    return TIMESTAMP_LINE_PATTERN.match(line_lower) is not None
+
+def is_noise_comment(comment: str) -> bool:
+    """
+    Check if the entire comment is just noise/interface elements.
+
+    Args:
+        comment: Cleaned comment text
+
+    Returns:
+        True if the comment should be filtered out
+    """
+    if not comment or len(comment.strip()) == 0:
+        return True
+
+    # Check if comment is just a username or very short
+    lines = [line.strip() for line in comment.split('\n') if line.strip()]
+
+    # If only one line and it's short, likely just a username
+    if len(lines) == 1 and len(lines[0]) < 20:
+        return True
+
+    # Check if all lines are short (likely just metadata)
+    return all(len(line) < 15 for line in lines)
+
+def clean_comment_batch(raw_comments: List[str]) -> List[str]:
+    """
+    Clean a batch of raw comment texts and drop the ones that are just noise.
+
+    Args:
+        raw_comments: Comment texts as read from the page
+
+    Returns:
+        Cleaned comments in page order (duplicates are kept)
+    """
+    cleaned_comments = []
+    append = cleaned_comments.append
+    for comment_text in raw_comments:
+        cleaned_comment = clean_comment_text(comment_text)
+
+        # Filter out empty comments and common noise
+        if len(cleaned_comment) > 1 and not is_noise_comment(cleaned_comment):
+            append(cleaned_comment)
+
+    return cleaned_comments
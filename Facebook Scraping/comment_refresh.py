@@ -0,0 +1,89 @@
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Set
+
+from post_store import PostStore
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def comment_fingerprint(comment: str) -> str:
+    """
+    Hash a cleaned comment into a short fingerprint.
+
+    Whitespace is normalised first so the same comment read from the DOM or
+    from a GraphQL payload produces the same fingerprint.
+    """
+    normalised = " ".join(comment.split())
+    return hashlib.sha1(normalised.encode('utf-8')).hexdigest()[:16]
+
+def comment_fingerprints(comments: Iterable[str]) -> Set[str]:
+    """Fingerprint every comment of a post."""
+    return {comment_fingerprint(comment) for comment in comments}
+
+def merge_refreshed_post(existing: Dict, refreshed: Dict) -> Dict:
+    """
+    Merge the comments found on a revisit into the stored post.
+
+    Args:
+        existing: Post record currently in the store
+        refreshed: Post scraped again in refresh mode
+
+    Returns:
+        The stored post with only the new comments appended and the refresh
+        bookkeeping fields updated
+    """
+    known = comment_fingerprints(existing.get("comments", []))
+    new_comments = []
+    for comment in refreshed.get("comments", []):
+        fingerprint = comment_fingerprint(comment)
+        if fingerprint not in known:
+            known.add(fingerprint)
+            new_comments.append(comment)
+
+    merged = dict(existing)
+    merged["comments"] = existing.get("comments", []) + new_comments
+    if not merged.get("post_text") and refreshed.get("post_text"):
+        merged["post_text"] = refreshed["post_text"]
+
+    if refreshed.get("comment_records"):
+        known_ids = {record["id"] for record in existing.get("comment_records", [])}
+        merged["comment_records"] = existing.get("comment_records", []) + [
+            record for record in refreshed["comment_records"] if record["id"] not in known_ids
+        ]
+
+    refreshed_at = time.strftime(TIMESTAMP_FORMAT)
+    merged["last_refreshed"] = refreshed_at
+    merged["new_comments_at_last_refresh"] = len(new_comments)
+    if new_comments:
+        merged["last_new_comment_at"] = refreshed_at
+
+    return merged
+
+def last_activity(post: Dict) -> str:
+    """Return when a post last gained comments: its latest refresh with new comments, or its first scrape."""
+    return post.get("last_new_comment_at") or post.get("scraping_timestamp") or ""
+
+def select_posts_for_refresh(store: PostStore, limit: int, min_interval_hours: float) -> List[Dict]:
+    """
+    Pick the stored posts most worth revisiting.
+
+    Posts that gained comments most recently come first, since active threads
+    are the ones likely to have new replies. Failed posts and posts refreshed
+    within min_interval_hours are skipped.
+
+    Args:
+        store: Post store to choose from
+        limit: Maximum number of posts to return
+        min_interval_hours: Minimum time between two refreshes of a post
+
+    Returns:
+        Stored post records, most recently active first
+    """
+    cutoff = (datetime.now() - timedelta(hours=min_interval_hours)).strftime(TIMESTAMP_FORMAT)
+    candidates = [
+        post for post in store.posts()
+        if "error" not in post and post.get("last_refreshed", "") < cutoff
+    ]
+    candidates.sort(key=last_activity, reverse=True)
+    return candidates[:limit]
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import re
+import weakref
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+# Facebook prefixes some JSON responses with this guard
+JSON_GUARD = "for (;;);"
+
+# Comment data embedded in the initial HTML document
+EMBEDDED_JSON_PATTERN = re.compile(r'<script type="application/json"[^>]*>(.*?)</script>', re.DOTALL)
+
+def iter_json_documents(body: str) -> Iterator:
+    """
+    Yield every JSON document in a Facebook response body.
+
+    GraphQL responses stream several JSON documents separated by newlines, so
+    each line is decoded on its own and lines that are not JSON are skipped.
+    """
+    if body.startswith(JSON_GUARD):
+        body = body[len(JSON_GUARD):]
+
+    for line in body.splitlines():
+        line = line.strip()
+        if not line or line[0] not in "{[":
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            continue
+
+def iter_comment_nodes(data) -> Iterator[Dict]:
+    """Walk decoded JSON and yield every object that describes a comment."""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            if item.get("__typename") == "Comment" and isinstance(item.get("body"), dict):
+                yield item
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+def comment_record(node: Dict) -> Optional[Dict]:
+    """
+    Convert a GraphQL comment node into a flat comment record.
+
+    Args:
+        node: Decoded comment object from a GraphQL response
+
+    Returns:
+        Dictionary with id, author, text, timestamp and parent_id, or None if
+        the node has no text
+    """
+    text = (node.get("body") or {}).get("text") or ""
+    if not text.strip():
+        return None
+
+    author = (node.get("author") or {}).get("name") or ""
+    parent = node.get("comment_parent") or {}
+
+    timestamp = ""
+    created_time = node.get("created_time")
+    if isinstance(created_time, (int, float)):
+        timestamp = datetime.fromtimestamp(created_time).strftime("%Y-%m-%d %H:%M:%S")
+
+    return {
+        "id": node.get("legacy_fbid") or node.get("id") or "",
+        "author": author,
+        "text": text,
+        "timestamp": timestamp,
+        "parent_id": parent.get("legacy_fbid") or parent.get("id"),
+    }
+
+def parse_graphql_payload(body: str) -> List[Dict]:
+    """
+    Parse every comment record out of a GraphQL response body.
+
+    Args:
+        body: Raw response text
+
+    Returns:
+        List of comment records in the order they appear
+    """
+    records = []
+    for document in iter_json_documents(body):
+        for node in iter_comment_nodes(document):
+            record = comment_record(node)
+            if record:
+                records.append(record)
+    return records
+
+def parse_embedded_comments(html: str) -> List[Dict]:
+    """Parse comment records from the JSON blobs embedded in a post's HTML."""
+    records = []
+    for match in EMBEDDED_JSON_PATTERN.finditer(html):
+        records.extend(parse_graphql_payload(match.group(1)))
+    return records
+
+def format_comment(record: Dict) -> str:
+    """
+    Format a comment record like the cleaned DOM comments.
+
+    Returns:
+        "author<TAB>text" with blank lines removed, matching clean_comment_text
+    """
+    lines = [line.strip() for line in record["text"].split("\n") if line.strip()]
+    text = "\n".join(lines)
+    return f"{record['author']}\t{text}" if record["author"] else text
+
+class CommentCapture:
+    """
+    Collects the comment records Facebook sends to a page while it loads.
+
+    Listens to the page's responses, parses the GraphQL comment payloads and
+    the JSON embedded in the post document, and keeps one record per comment.
+    Every request is tagged with the generation reset() was at when it was
+    sent, so a response to a request of the previous post is dropped even
+    when it arrives after the reset.
+    """
+
+    def __init__(self):
+        self.comments = {}
+        self.pending = set()
+        # Bumped by reset() so responses of the previous post that arrive late are dropped
+        self.generation = 0
+        self.request_generations = weakref.WeakKeyDictionary()
+
+    def attach(self, page):
+        """Start listening to the responses of page."""
+        page.on("request", self.handle_request)
+        page.on("response", self.handle_response)
+
+    def reset(self):
+        """Forget the comments captured for the previous post, including bodies still being read."""
+        for task in self.pending:
+            task.cancel()
+        self.pending = set()
+        self.comments = {}
+        self.generation += 1
+
+    def add_records(self, records: List[Dict]):
+        """Add parsed records, keeping the first copy of each comment."""
+        for record in records:
+            key = record["id"] or (record["author"], record["text"])
+            self.comments.setdefault(key, record)
+
+    def handle_request(self, request):
+        self.request_generations[request] = self.generation
+
+    def handle_response(self, response):
+        generation = self.request_generations.get(response.request, self.generation)
+        if generation != self.generation:
+            return
+        url = response.url
+        if "/api/graphql" in url:
+            parser = parse_graphql_payload
+        elif response.request.resource_type == "document":
+            parser = parse_embedded_comments
+        else:
+            return
+
+        task = asyncio.ensure_future(self._read(response, parser, generation))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _read(self, response, parser, generation):
+        try:
+            body = await response.text()
+        except Exception:
+            # The page navigated away or the body was evicted
+            return
+        if generation == self.generation:
+            self.add_records(parser(body))
+
+    async def drain(self) -> List[Dict]:
+        """
+        Wait for response bodies still being read and return all records.
+
+        Returns:
+            Captured comment records in arrival order
+        """
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+        return list(self.comments.values())
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import re
+from typing import Dict, List, Optional, Set
+
+from playwright.async_api import async_playwright
+
+import individual_post_scraper as scraper
+from post_store import PostStore
+from post_urls import post_key, post_key_string
+from retry_queue import RetryQueue
+from scrape_metrics import MetricsLog, print_stage_summary
+from selector_stats import SelectorStats
+from url_frontier import UrlFrontier
+
+# Configuration
+FEED_GROUPS = [
+    "vietnamnewzealand",
+    "vietnameseinnz",
+    "826048477881333",
+    "sovis",
+    "svtaiuc",
+    "740872500956353",
+]
+# Only queue posts whose text mentions one of these (case-insensitive); empty queues every post
+FEED_KEYWORDS = [
+    "chuyển tiền", "gửi tiền", "tỷ giá", "money transfer", "remit", "exchange rate",
+    "wise", "western union", "ofx", "moneygram",
+]
+FEED_MAX_SCROLLS = 50  # Safety cap on scrolls per group feed
+FEED_IDLE_SCROLLS = 5  # Stop a feed after this many scrolls in a row without new post links
+FEED_SCROLL_PAUSE_SECONDS = 2
+frontier_path = "Facebook Scraping/url_frontier.json"  # Discovered posts waiting to be scraped
+
+# Collects every post link in the feed with the text of the post it belongs to
+COLLECT_POST_LINKS_SCRIPT = """
+() => {
+    const texts = new Map();
+    const links = [];
+    for (const anchor of document.querySelectorAll('a[href*="/posts/"], a[href*="/permalink/"], a[href*="multi_permalinks"]')) {
+        const article = anchor.closest('[role="article"]');
+        if (article && !texts.has(article)) {
+            texts.set(article, article.innerText.slice(0, 2000));
+        }
+        links.push({href: anchor.href, text: article ? texts.get(article) : ""});
+    }
+    return links;
+}
+"""
+
+def group_feed_url(group: str) -> str:
+    """Return the URL of a group's feed with the newest posts first."""
+    return f"https://www.facebook.com/groups/{group}/?sorting_setting=CHRONOLOGICAL"
+
+def keyword_pattern(keywords: List[str]) -> Optional[re.Pattern]:
+    """Compile the keyword filter into one whole-word, case-insensitive pattern (None matches everything)."""
+    if not keywords:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b", re.IGNORECASE)
+
+async def crawl_group_feed(page, group: str, frontier: UrlFrontier, store: PostStore,
+                           keywords: List[str] = FEED_KEYWORDS) -> int:
+    """
+    Scroll a group feed and queue the posts that match the keyword filter.
+
+    Args:
+        page: Playwright page to load the feed in
+        group: Group id or vanity name
+        frontier: Frontier to queue discovered posts in
+        store: Post store; posts already scraped are not queued again
+        keywords: Keyword filter for the post text
+
+    Returns:
+        Number of posts added to the frontier
+    """
+    print(f"\n[feed {group}] Crawling {group_feed_url(group)}")
+    await page.goto(group_feed_url(group), wait_until="domcontentloaded")
+    await asyncio.sleep(FEED_SCROLL_PAUSE_SECONDS)
+
+    pattern = keyword_pattern(keywords)
+    seen: Set[str] = set()
+    added = 0
+    idle_scrolls = 0
+    for scroll_count in range(FEED_MAX_SCROLLS):
+        new_links = 0
+        for link in await page.evaluate(COLLECT_POST_LINKS_SCRIPT):
+            if not post_key(link["href"]):
+                continue
+            key = post_key_string(link["href"])
+            if key in seen:
+                continue
+            seen.add(key)
+            new_links += 1
+
+            if link["href"] in store or (pattern and not pattern.search(link["text"])):
+                continue
+            if frontier.add(link["href"], group, " ".join(link["text"].split())[:200]):
+                added += 1
+
+        print(f"[feed {group}] Scroll {scroll_count + 1}: {len(seen)} posts seen, {added} queued")
+        idle_scrolls = idle_scrolls + 1 if not new_links else 0
+        if idle_scrolls >= FEED_IDLE_SCROLLS:
+            break
+
+        if not await page.evaluate(scraper.SCROLL_TO_BOTTOM_SCRIPT, None):
+            await page.mouse.wheel(0, 3000)
+        await asyncio.sleep(FEED_SCROLL_PAUSE_SECONDS)
+
+    return added
+
+async def crawl_and_scrape_async(groups: List[str] = FEED_GROUPS, keywords: List[str] = FEED_KEYWORDS,
+                                 pool_size: int = scraper.PAGE_POOL_SIZE,
+                                 metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """
+    Discover posts in group feeds and scrape them as they are found.
+
+    One tab crawls the feeds into the frontier while the scraping tabs take
+    posts from it, so scraping starts with the first discovered post. Posts
+    left in the frontier by an earlier run are scraped first.
+
+    Args:
+        groups: Group ids or vanity names to crawl
+        keywords: Keyword filter for the post text
+        pool_size: Number of tabs scraping posts at the same time
+        metrics_log: Log to write each post's stage timings and counters to
+
+    Returns:
+        List of dictionaries containing post data and comments
+    """
+    store = PostStore(scraper.posts_log_path, scraper.file_path)
+    retry_queue = RetryQueue(scraper.retry_queue_path, scraper.RETRY_BASE_DELAY_SECONDS,
+                             scraper.RETRY_MAX_DELAY_SECONDS, scraper.RETRY_MAX_ATTEMPTS)
+    retry_queue.seed_from(store.posts())
+    frontier = UrlFrontier(frontier_path)
+    selector_stats = (SelectorStats(scraper.selector_stats_path, scraper.STALE_SELECTOR_POSTS)
+                      if scraper.ADAPTIVE_SELECTORS else None)
+    if len(frontier):
+        print(f"Resuming with {len(frontier)} posts left in the frontier")
+
+    async with async_playwright() as p:
+        context, blocker = await scraper.launch_scraping_context(p)
+        discovery_done = asyncio.Event()
+
+        async def discover():
+            page = await context.new_page()
+            try:
+                for group in groups:
+                    added = await crawl_group_feed(page, group, frontier, store, keywords)
+                    print(f"[feed {group}] Queued {added} new posts")
+            finally:
+                discovery_done.set()
+                await page.close()
+
+        try:
+            _, results = await asyncio.gather(
+                discover(),
+                scraper.scrape_posts_with_context(context, [], pool_size, blocker, store, retry_queue=retry_queue,
+                                                  metrics_log=metrics_log, selector_stats=selector_stats,
+                                                  frontier=frontier, discovery_done=discovery_done)
+            )
+        finally:
+            await context.close()
+
+    if selector_stats:
+        selector_stats.print_stale_report()
+
+    return results
+
+def crawl_and_scrape(groups: List[str] = FEED_GROUPS, keywords: List[str] = FEED_KEYWORDS,
+                     pool_size: int = scraper.PAGE_POOL_SIZE, metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """Synchronous wrapper around crawl_and_scrape_async."""
+    return asyncio.run(crawl_and_scrape_async(groups, keywords, pool_size, metrics_log))
+
+if __name__ == "__main__":
+    if not os.path.exists(scraper.USER_DATA_DIR):
+        print("Please run your login script first to create a session.")
+    else:
+        print(f"Crawling {len(FEED_GROUPS)} group feeds for posts mentioning: {', '.join(FEED_KEYWORDS) or 'anything'}")
+        metrics_log = MetricsLog(scraper.metrics_path)
+        results = crawl_and_scrape(metrics_log=metrics_log)
+        scraper.save_results_to_json(results)
+        if results:
+            scraper.print_summary(results)
+            print_stage_summary(metrics_log.records)
+        else:
+            print("No new posts found.")
@@ -1,15 +1,60 @@
 import time
+import asyncio
 from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 import os
 import json
-import re
-from typing import List, Dict
+from collections import deque
+from typing import Awaitable, Callable, List, Dict, Optional, Set, Tuple
+from resource_blocking import ResourceBlocker, format_stats
+from graphql_comments import CommentCapture, format_comment
+from comment_cleaning import clean_comment_batch
+from post_store import PostStore
+from post_urls import dedupe_post_urls, post_key
+from retry_queue import RetryQueue
+from comment_refresh import comment_fingerprints, merge_refreshed_post, select_posts_for_refresh
+from scrape_metrics import MetricsLog, PostMetrics, print_stage_summary
+from selector_stats import SelectorStats
+from page_snapshots import SnapshotRecorder
+from url_frontier import UrlFrontier
 
 # Configuration
 USER_DATA_DIR = "./playwright_session"
 HEADLESS_MODE = False
 SCROLL_TIMES = 5  # How many times to scroll to load more comments
+WAIT_MODE = "fixed"  # "fixed" uses timed sleeps, "adaptive" waits for the DOM to stop changing
+MAX_ADAPTIVE_SCROLLS = 100  # Safety cap on scrolls in adaptive mode
+COMMENT_SETTLE_TIMEOUT_MS = 1500  # Adaptive mode stops scrolling after this long without new comments
+PAGE_READY_TIMEOUT_MS = 10000  # Adaptive mode waits this long for the first post/comment node
+PAGE_POOL_SIZE = 1  # How many tabs scrape posts at the same time (keep small to avoid rate limits)
+POST_DELAY_SECONDS = 2  # Pause a tab takes between two posts
+FRONTIER_POLL_SECONDS = 2  # How often idle tabs check the frontier while feeds are still being crawled
+RETRY_MAX_ATTEMPTS = 5  # Give up on a failing post after this many attempts
+RETRY_BASE_DELAY_SECONDS = 60  # Wait before the first retry; doubles after every failure
+RETRY_MAX_DELAY_SECONDS = 6 * 3600
+RETRY_INTERLEAVE = 3  # Retry one due post after every this many new posts
+RETRY_WAIT_LIMIT_SECONDS = 120  # Once new posts run out, wait this long at most for a retry to become due
+REFRESH_LIMIT = 20  # How many already-scraped posts to revisit per refresh run
+REFRESH_MIN_INTERVAL_HOURS = 12  # Don't revisit a post more often than this
+ADAPTIVE_SELECTORS = True  # Try the selectors that matched most often for a group first
+STALE_SELECTOR_POSTS = 10  # Warn about a selector that hasn't matched for this many posts of a group
+RECORD_SNAPSHOTS = False  # Save each scraped page for offline replay (see benchmark_replay.py)
+COMMENT_SOURCE = "dom"  # "dom" reads rendered comments, "graphql" parses Facebook's comment responses (DOM as fallback)
+BLOCK_RESOURCES = False  # Abort requests for resources the text extraction never uses
+BLOCKED_RESOURCE_TYPES = ["image", "media", "font"]
+BLOCKED_URL_PATTERNS = [
+    r"\.(?:png|jpe?g|gif|webp|mp4|woff2?)(?:\?|$)",  # Static media served under other resource types
+    r"facebook\.com/tr[/?]",  # Tracking pixel
+    r"facebook\.com/ajax/bz",  # Client-side logging
+    r"connect\.facebook\.net",
+    r"google-analytics\.com|googletagmanager\.com|doubleclick\.net",
+]
 file_path = "Facebook Scraping/scraped_posts.json"
+posts_log_path = "Facebook Scraping/scraped_posts.jsonl"  # Append-only log each post is committed to
+retry_queue_path = "Facebook Scraping/retry_queue.json"  # Failed posts waiting to be retried
+metrics_path = "Facebook Scraping/scrape_metrics.jsonl"  # Per-post stage timings and counters
+selector_stats_path = "Facebook Scraping/selector_stats.json"  # Which selectors matched, per group
+snapshots_dir = "Facebook Scraping/snapshots"  # Where RECORD_SNAPSHOTS saves pages
 
 # List of individual post URLs to scrape
 POST_URLS = [
@@ -49,323 +94,716 @@ POST_URLS = [
     
 ]
 
-def clean_comment_text(comment_text: str) -> str:
+# Selectors for the main post text, tried in order
+POST_CONTENT_SELECTORS = [
+    'div[class="x1iorvi4 xjkvuk6 x1g0dm76 xpdmqnj"]',
+    'div[dir="auto"][style="text-align: start;"]',
+    '[data-ad-preview="message"]',
+    'div[data-testid="post_message"]',
+    'div[class*="userContent"]',
+    'div[class*="x11i5rnm xat24cr x1mh8g0r x1vvkbs"]'  # Common post text container
+]
+
+# Selectors for individual comments, tried in order
+COMMENT_SELECTORS = [
+    'div[class*="xdj266r"][class*="x11i5rnm"][class*="xat24cr"]',  # Common comment container
+    'div[data-testid="comment"]',
+    'div[class*="comment"]',
+    'div[aria-label*="Comment"]',
+    'li[data-testid="comment"]'
+]
+
+VIEW_MORE_COMMENTS_SELECTOR = 'div[role="button"]:has-text("View more comments")'
+COMMENT_CONTAINER_SELECTOR = 'div[class="xb57i2i x1q594ok x5lxg6s x78zum5 xdt5ytf x6ikm8r x1ja2u2z x1pq812k x1rohswg xfk6m8 x1yqm8si xjx87ck xx8ngbg xwo3gff x1n2onr6 x1oyok0e x1odjw0f x1iyjqo2 xy5w88m"]'
+
+# Counts the nodes matched by the first comment selector that matches anything
+COUNT_COMMENTS_SCRIPT = """
+(selectors) => {
+    for (const selector of selectors) {
+        const count = document.querySelectorAll(selector).length;
+        if (count) return count;
+    }
+    return 0;
+}
+"""
+
+# Resolves once the comment count grows past the previous count
+WAIT_FOR_MORE_COMMENTS_SCRIPT = """
+([selectors, previous]) => {
+    for (const selector of selectors) {
+        const count = document.querySelectorAll(selector).length;
+        if (count) return count > previous;
+    }
+    return false;
+}
+"""
+
+# Reads the post text and the raw comment texts in one round trip. The post text
+# comes from the first matching post selector; comments come from the first
+# comment selector at or after startIndex that matches any elements.
+EXTRACT_CONTENT_SCRIPT = """
+([postSelectors, commentSelectors, startIndex]) => {
+    let postText = null;
+    let postSelectorIndex = -1;
+    if (postSelectors) {
+        postText = "";
+        for (let index = 0; index < postSelectors.length; index++) {
+            const element = document.querySelector(postSelectors[index]);
+            if (element) {
+                postText = element.innerText.trim();
+                postSelectorIndex = index;
+                break;
+            }
+        }
+    }
+    for (let index = startIndex; index < commentSelectors.length; index++) {
+        let elements = [];
+        try {
+            elements = document.querySelectorAll(commentSelectors[index]);
+        } catch (error) {
+            continue;
+        }
+        if (elements.length) {
+            return {postText, postSelectorIndex, selectorIndex: index,
+                    comments: Array.from(elements, element => element.innerText.trim())};
+        }
+    }
+    return {postText, postSelectorIndex, selectorIndex: -1, comments: []};
+}
+"""
+
+# Scrolls the comment container (or the page) to the bottom, returns False if it could not move
+SCROLL_TO_BOTTOM_SCRIPT = """
+(element) => {
+    const target = element || document.scrollingElement;
+    const before = target.scrollTop;
+    target.scrollTop += 10000;
+    return target.scrollTop !== before;
+}
+"""
+
+async def count_comment_nodes(page) -> int:
+    """Count the comment nodes currently rendered on the page."""
+    return await page.evaluate(COUNT_COMMENTS_SCRIPT, COMMENT_SELECTORS)
+
+async def wait_for_more_comments(page, previous_count: int) -> bool:
     """
-    Clean Facebook comment text by removing interface elements and metadata.
+    Wait until more comment nodes than previous_count are rendered.
     
     Args:
-        comment_text: Raw comment text from Facebook
+        page: Playwright page showing the post
+        previous_count: Comment node count before the last click or scroll
         
     Returns:
-        Cleaned comment text
+        True if new comments appeared before COMMENT_SETTLE_TIMEOUT_MS ran out
     """
-    if not comment_text:
-        return ""
-    
-    # Remove common Facebook interface elements
-    noise_patterns = [
-        r'\n\d+[wdhms]\n',  # Remove time stamps with newlines
-        r'Like',
-        r'Reply', 
-        r'Share',
-        r'See translation',
-        r'Edited',
-        r'Follow',
-        r'\n·\n',
-        r'^\s*·\s*',  # Remove leading dots
-        r'\s+·\s+Follow\s*$',  # Remove trailing "· Follow"
-    ]
-    
-    cleaned_text = comment_text
-    
-    # Apply all noise removal patterns
-    for pattern in noise_patterns:
-        cleaned_text = re.sub(pattern, '', cleaned_text, flags=re.IGNORECASE)
-    
-    # Clean up extra whitespace and newlines
-    cleaned_text = re.sub(r'\n+', '\n', cleaned_text)  # Multiple newlines to single
-    cleaned_text = re.sub(r'^\s+|\s+$', '', cleaned_text)  # Strip leading/trailing whitespace
-    
-    # Remove lines that are just interface elements
-    lines = cleaned_text.split('\n')
-    filtered_lines = []
-    
-    for line in lines:
-        line = line.strip()
-        if line and not is_interface_line(line):
-            filtered_lines.append(line)
-    
-    # Separate username from comment content with tab
-    if len(filtered_lines) >= 2:
-        # First line is typically the username, rest is the comment
-        username = filtered_lines[0]
-        comment_content = '\n'.join(filtered_lines[1:])
-        return f"{username}\t{comment_content}"
-    elif len(filtered_lines) == 1:
-        # Only one line - could be just username or username with short comment
-        return filtered_lines[0]
-    else:
-        return ""
+    try:
+        await page.wait_for_function(
+            WAIT_FOR_MORE_COMMENTS_SCRIPT,
+            arg=[COMMENT_SELECTORS, previous_count],
+            timeout=COMMENT_SETTLE_TIMEOUT_MS
+        )
+        return True
+    except PlaywrightTimeoutError:
+        return False
+
+async def load_post(page, post_url: str):
+    """Navigate to a post and wait until it is ready for extraction."""
+    if WAIT_MODE != "adaptive":
+        await page.goto(post_url)
+        await asyncio.sleep(3)  # Wait for page to load
+        return
+    
+    # Return as soon as the HTML is parsed, then wait for the first post or comment node
+    await page.goto(post_url, wait_until="domcontentloaded")
+    try:
+        await page.wait_for_selector(
+            ", ".join(POST_CONTENT_SELECTORS + COMMENT_SELECTORS),
+            timeout=PAGE_READY_TIMEOUT_MS
+        )
+    except PlaywrightTimeoutError:
+        pass
 
-def is_interface_line(line: str) -> bool:
+async def expand_comments(page, label: str = ""):
+    """Click any visible "View more comments" buttons."""
+    try:
+        view_more_buttons = await page.query_selector_all(VIEW_MORE_COMMENTS_SELECTOR)
+        for button in view_more_buttons:
+            if await button.is_visible():
+                previous_count = await count_comment_nodes(page) if WAIT_MODE == "adaptive" else 0
+                await button.click()
+                if WAIT_MODE == "adaptive":
+                    await wait_for_more_comments(page, previous_count)
+                else:
+                    await asyncio.sleep(2)
+                print(f"{label}Clicked 'View more comments'")
+    except Exception as e:
+        print(f"{label}Could not click 'View more comments': {e}")
+
+async def loaded_comment_fingerprints(page) -> Set[str]:
+    """Fingerprint the cleaned comments currently rendered on the page."""
+    batch = await page.evaluate(EXTRACT_CONTENT_SCRIPT, [None, COMMENT_SELECTORS, 0])
+    return comment_fingerprints(clean_comment_batch(batch["comments"]))
+
+async def reached_known_comments(page, known_fingerprints: Set[str], seen_fingerprints: Set[str]) -> Tuple[bool, Set[str]]:
     """
-    Check if a line is just Facebook interface text that should be removed.
+    Check if the last scroll only loaded comments that were already scraped.
     
     Args:
-        line: A single line of text
+        page: Playwright page showing the post
+        known_fingerprints: Fingerprints of the comments already stored
+        seen_fingerprints: Fingerprints rendered before the last scroll
         
     Returns:
-        True if the line should be filtered out
+        Tuple of (whether to stop scrolling, fingerprints rendered now)
+    """
+    loaded = await loaded_comment_fingerprints(page)
+    newly_loaded = loaded - seen_fingerprints
+    return bool(newly_loaded) and newly_loaded <= known_fingerprints, loaded
+
+async def scroll_comments(page, label: str = "", known_fingerprints: Optional[Set[str]] = None):
     """
-    line_lower = line.lower().strip()
+    Scroll the comment container to load more comments.
     
-    # Interface elements to remove
-    interface_elements = [
-        'like', 'reply', 'share', 'see translation', 'edited', 'follow',
-        '·', 'anonymous participant', 'likesee translation', 'likeShare',
-        'likereply', 'replyshare', 'likereplyshare', 'likesee translationedited'
-    ]
+    In "fixed" mode this scrolls SCROLL_TIMES times with a fixed pause. In
+    "adaptive" mode it keeps scrolling only while new comment nodes keep
+    appearing, up to MAX_ADAPTIVE_SCROLLS. When known_fingerprints is given
+    (refresh mode), scrolling also stops once a scroll only loads comments
+    that were already scraped.
+    """
+    print(f"{label}Scrolling to load more comments...")
+
+    # First, find the actual scrollable comment container
+    comment_container = await page.query_selector(COMMENT_CONTAINER_SELECTOR)
     
-    # Check if line is only interface elements
-    if line_lower in interface_elements:
-        return True
+    seen_fingerprints = set()
+    if known_fingerprints is not None:
+        seen_fingerprints = await loaded_comment_fingerprints(page)
+
+    if WAIT_MODE != "adaptive":
+        for scroll_count in range(SCROLL_TIMES):
+            if comment_container:
+                # Scroll within the comment container
+                await page.evaluate(SCROLL_TO_BOTTOM_SCRIPT, comment_container)
+                print(f"{label}Scrolled comment container {scroll_count + 1}/{SCROLL_TIMES}")
+                await asyncio.sleep(1)
+            else:
+                # Fallback to page scroll
+                await page.mouse.wheel(0, 1000)
+                print(f"{label}Fallback scroll {scroll_count + 1}/{SCROLL_TIMES}")
+            
+            if known_fingerprints is not None:
+                reached, seen_fingerprints = await reached_known_comments(page, known_fingerprints, seen_fingerprints)
+                if reached:
+                    print(f"{label}Reached already-scraped comments, stopping")
+                    break
+        
+        # Wait a bit after scrolling
+        await asyncio.sleep(2)
+        return
     
-    # Check for combined interface elements at the end of lines
-    interface_endings = [
-        'like', 'reply', 'share', 'see translation', 'edited', 'follow',
-        'likesee translation', 'likeshare', 'likereply', 'replyshare'
-    ]
-    
-    for ending in interface_endings:
-        if line_lower.endswith(ending):
-            # Check if removing this ending leaves meaningful content
-            remaining = line_lower[:-len(ending)].strip()
-            if not remaining or len(remaining) < 5:
-                return True
-    
-    # Check if line is just a time stamp (like "1w", "2d", etc.)
-    if re.match(r'^\d+[wdhms]$', line_lower):
-        return True
+    comment_count = await count_comment_nodes(page)
+    for scroll_count in range(MAX_ADAPTIVE_SCROLLS):
+        # Nothing left to scroll means every loaded comment is already on screen
+        moved = await page.evaluate(SCROLL_TO_BOTTOM_SCRIPT, comment_container)
+        if not moved:
+            break
+        if not await wait_for_more_comments(page, comment_count):
+            break
+        comment_count = await count_comment_nodes(page)
+        print(f"{label}Scroll {scroll_count + 1}: {comment_count} comment nodes loaded")
+        
+        if known_fingerprints is not None:
+            reached, seen_fingerprints = await reached_known_comments(page, known_fingerprints, seen_fingerprints)
+            if reached:
+                print(f"{label}Reached already-scraped comments, stopping")
+                break
     
-    # Check if line is very short and likely not meaningful content
-    if len(line) <= 3:
-        return True
+    print(f"{label}Comment count levelled off at {comment_count} nodes")
+
+async def extract_post_content(page, label: str = "", include_comments: bool = True,
+                               metrics: Optional[PostMetrics] = None,
+                               selector_stats: Optional[SelectorStats] = None,
+                               group: str = "") -> Tuple[str, List[str]]:
+    """
+    Extract the post text and cleaned comments with a single page.evaluate.
+    
+    The selector cascade runs inside the page and returns every raw comment
+    text for the first comment selector that matches. Only if none of those
+    survive cleaning is the page asked again, starting at the next selector.
+    With selector statistics, the selectors that matched most often for the
+    post's group are tried first and the ones that match are recorded.
+    
+    Args:
+        page: Playwright page showing the post
+        label: Prefix for log messages
+        include_comments: Set to False to only read the post text
+        metrics: Metrics of the post, to time extraction and cleaning separately
+        selector_stats: Selector statistics to order the selectors by and record matches in
+        group: Group id of the post, for the selector statistics
+        
+    Returns:
+        Tuple of (post text, cleaned comments)
+    """
+    metrics = metrics or PostMetrics(page.url)
+    post_selectors = POST_CONTENT_SELECTORS
+    comment_selectors = COMMENT_SELECTORS
+    if selector_stats:
+        post_selectors = selector_stats.order("post", group, POST_CONTENT_SELECTORS)
+        comment_selectors = selector_stats.order("comment", group, COMMENT_SELECTORS)
+    
+    with metrics.span("extraction"):
+        batch = await page.evaluate(EXTRACT_CONTENT_SCRIPT,
+                                    [post_selectors, comment_selectors if include_comments else [], 0])
+    post_text = batch["postText"]
+    if selector_stats:
+        # The cascade stops at the first match, so only the selectors up to it were tried
+        post_selector_index = batch["postSelectorIndex"]
+        if post_selector_index >= 0:
+            selector_stats.record("post", group, post_selectors[post_selector_index],
+                                  post_selectors[:post_selector_index + 1])
+        else:
+            selector_stats.record("post", group, None, post_selectors)
+    metrics.count("post_text_found", bool(post_text))
+    if not post_text:
+        print(f"{label}Could not extract main post text")
+    
+    all_comments = []
+    matched_selector = None
+    tried_count = len(comment_selectors)  # Every selector was tried unless one matched
+    while batch["selectorIndex"] >= 0:
+        with metrics.span("cleaning"):
+            all_comments = clean_comment_batch(batch["comments"])
+        
+        # If we found comments with this selector, stop
+        if all_comments:
+            matched_selector = comment_selectors[batch["selectorIndex"]]
+            tried_count = batch["selectorIndex"] + 1
+            metrics.count("raw_comment_nodes", len(batch["comments"]))
+            metrics.count("comment_selector", matched_selector)
+            break
+        
+        with metrics.span("extraction"):
+            batch = await page.evaluate(EXTRACT_CONTENT_SCRIPT, [None, comment_selectors, batch["selectorIndex"] + 1])
+    
+    if selector_stats and include_comments:
+        selector_stats.record("comment", group, matched_selector, comment_selectors[:tried_count])
     
-    return False
+    return post_text, all_comments
 
-def is_noise_comment(comment: str) -> bool:
+async def scrape_post(page, post_url: str, label: str = "", blocker: Optional[ResourceBlocker] = None,
+                      capture: Optional[CommentCapture] = None, known_fingerprints: Optional[Set[str]] = None,
+                      metrics: Optional[PostMetrics] = None, selector_stats: Optional[SelectorStats] = None) -> Dict:
     """
-    Check if the entire comment is just noise/interface elements.
+    Scrape the post text and comments of a single Facebook post.
     
     Args:
-        comment: Cleaned comment text
+        page: Open Playwright page to load the post in
+        post_url: Facebook post URL to scrape
+        label: Prefix for log messages, used to tell concurrent tabs apart
+        blocker: Resource blocker installed on the context, if any
+        capture: Comment capture attached to page when COMMENT_SOURCE is "graphql"
+        known_fingerprints: Fingerprints of already stored comments when refreshing
+        metrics: Collects the stage timings and counters of this post
+        selector_stats: Selector statistics to order the extraction selectors by
         
     Returns:
-        True if the comment should be filtered out
+        Dictionary containing post data and comments, or the error raised
     """
-    if not comment or len(comment.strip()) == 0:
-        return True
+    metrics = metrics or PostMetrics(post_url)
+    key = post_key(post_url)
+    group = key[0] if key else ""
+    if blocker:
+        blocker.reset(page)
+    if capture:
+        capture.reset()
     
-    # Check if comment is just a username or very short
-    lines = [line.strip() for line in comment.split('\n') if line.strip()]
+    try:
+        with metrics.span("navigation"):
+            await load_post(page, post_url)
+        with metrics.span("expand_comments"):
+            await expand_comments(page, label)
+        with metrics.span("scroll"):
+            await scroll_comments(page, label, known_fingerprints)
+        
+        # Extract post content
+        post_data = {
+            "url": post_url,
+            "post_text": "",
+            "comments": [],
+            "scraping_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+        
+        comment_records = []
+        if capture:
+            with metrics.span("graphql_drain"):
+                comment_records = await capture.drain()
+        if comment_records:
+            # Structured comments need no cleaning, so only the post text comes from the DOM
+            post_data["post_text"], _ = await extract_post_content(page, label, include_comments=False, metrics=metrics,
+                                                                 selector_stats=selector_stats, group=group)
+            metrics.count("comment_source", "graphql")
+            post_data["comment_records"] = comment_records
+            all_comments = [format_comment(record) for record in comment_records]
+            print(f"{label}Captured {len(comment_records)} comments from GraphQL responses")
+        else:
+            if capture:
+                print(f"{label}No GraphQL comments captured, falling back to the DOM")
+            post_data["post_text"], all_comments = await extract_post_content(page, label, metrics=metrics,
+                                                                          selector_stats=selector_stats, group=group)
+            metrics.count("comment_source", "dom")
+        
+        # Remove duplicates while preserving order
+        seen = set()
+        unique_comments = []
+        for comment in all_comments:
+            if comment not in seen:
+                seen.add(comment)
+                unique_comments.append(comment)
+        
+        post_data["comments"] = unique_comments
+        metrics.count("comments", len(unique_comments))
+        print(f"{label}Extracted {len(unique_comments)} unique comments")
+        if blocker:
+            stats = blocker.pop_stats(page)
+            for name in ("bytes_loaded", "allowed_requests", "blocked_requests", "estimated_bytes_saved"):
+                metrics.count(name, stats[name])
+            print(f"{label}{format_stats(stats)}")
+        
+        return post_data
+        
+    except Exception as e:
+        print(f"{label}Error scraping post {post_url}: {e}")
+        return {
+            "url": post_url,
+            "error": str(e),
+            "scraping_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+async def refresh_post(page, existing: Dict, label: str = "", blocker: Optional[ResourceBlocker] = None,
+                       capture: Optional[CommentCapture] = None, metrics: Optional[PostMetrics] = None,
+                       selector_stats: Optional[SelectorStats] = None) -> Dict:
+    """
+    Revisit an already scraped post and merge in only its new comments.
     
-    # If only one line and it's short, likely just a username
-    if len(lines) == 1 and len(lines[0]) < 20:
-        return True
+    Args:
+        page: Open Playwright page to load the post in
+        existing: Post record currently in the store
+        label: Prefix for log messages
+        blocker: Resource blocker installed on the context, if any
+        capture: Comment capture attached to page, if any
+        metrics: Collects the stage timings and counters of this post
+        selector_stats: Selector statistics to order the extraction selectors by
+        
+    Returns:
+        The merged post record, or the error dictionary if the revisit failed
+    """
+    known_fingerprints = comment_fingerprints(existing.get("comments", []))
+    refreshed = await scrape_post(page, existing["url"], label, blocker, capture, known_fingerprints, metrics,
+                                  selector_stats)
+    if "error" in refreshed:
+        return refreshed
+    
+    merged = merge_refreshed_post(existing, refreshed)
+    if metrics:
+        metrics.count("new_comments", merged["new_comments_at_last_refresh"])
+    print(f"{label}Merged {merged['new_comments_at_last_refresh']} new comments")
+    return merged
+
+async def scrape_posts_with_context(context, post_urls: List[str], pool_size: int = PAGE_POOL_SIZE,
+                                    blocker: Optional[ResourceBlocker] = None,
+                                    store: Optional[PostStore] = None,
+                                    existing_posts: Optional[Dict[str, Dict]] = None,
+                                    retry_queue: Optional[RetryQueue] = None,
+                                    metrics_log: Optional[MetricsLog] = None,
+                                    selector_stats: Optional[SelectorStats] = None,
+                                    record_to: Optional[str] = None,
+                                    on_result: Optional[Callable[[Dict], Awaitable[None]]] = None,
+                                    frontier: Optional[UrlFrontier] = None,
+                                    discovery_done: Optional[asyncio.Event] = None) -> List[Dict]:
+    """
+    Scrape posts concurrently using a pool of tabs on an open browser context.
     
-    # Check if all lines are short (likely just metadata)
-    if all(len(line) < 15 for line in lines):
-        return True
+    Each tab takes the next URL as soon as it finishes its current post, so
+    throughput grows with the pool size while every post is still scraped
+    exactly as in the single-tab flow. With a retry queue, failed posts are
+    scheduled with backoff and due retries are interleaved with new posts.
+    With a frontier, tabs also take the posts a feed crawler discovers and
+    keep waiting for more until discovery_done is set.
     
-    return False
+    Args:
+        context: Open Playwright browser context (shares the login session)
+        post_urls: List of Facebook post URLs to scrape
+        pool_size: Number of tabs scraping at the same time
+        blocker: Resource blocker already installed on the context, if any
+        store: Post store to commit each post to as soon as it is scraped
+        existing_posts: Stored records by URL; these posts are refreshed and
+            only their new comments are merged in
+        retry_queue: Queue to schedule failed posts in and take due retries from
+        metrics_log: Log to write each post's stage timings and counters to
+        selector_stats: Selector statistics to order the extraction selectors by
+        record_to: Directory to save a snapshot of every scraped page to
+        on_result: Coroutine function called with each result as soon as it is stored
+        frontier: Frontier of discovered posts to take URLs from once post_urls run out
+        discovery_done: Event set when nothing more will be added to the frontier
+        
+    Returns:
+        List of post dictionaries, one per URL scraped, in the order first scraped
+    """
+    pending_urls = deque(post_urls)
+    in_progress = set()
+    results = {}
+    jobs_since_retry = 0
+    started = 0
+    
+    def next_url() -> Optional[str]:
+        nonlocal jobs_since_retry
+        due = [url for url in retry_queue.due() if url not in in_progress] if retry_queue is not None else []
+        if due and (not pending_urls or jobs_since_retry >= RETRY_INTERLEAVE):
+            jobs_since_retry = 0
+            return due[0]
+        if pending_urls:
+            jobs_since_retry += 1
+            return pending_urls.popleft()
+        url = frontier.pop() if frontier is not None else None
+        if url:
+            jobs_since_retry += 1
+        return url
+    
+    async def worker(tab_number: int):
+        nonlocal started
+        page = await context.new_page()
+        capture = None
+        if COMMENT_SOURCE == "graphql":
+            capture = CommentCapture()
+            capture.attach(page)
+        recorder = None
+        if record_to:
+            recorder = SnapshotRecorder(record_to)
+            recorder.attach(page)
+        
+        try:
+            while True:
+                post_url = next_url()
+                if post_url is None:
+                    # The feed crawler may still be discovering posts
+                    if discovery_done is not None and not discovery_done.is_set():
+                        await asyncio.sleep(FRONTIER_POLL_SECONDS)
+                        continue
+                    
+                    # Wait for a retry that is due soon, otherwise leave it for the next run
+                    wait = retry_queue.seconds_until_next() if retry_queue is not None and not in_progress else None
+                    if wait is None or wait > RETRY_WAIT_LIMIT_SECONDS:
+                        break
+                    await asyncio.sleep(wait)
+                    continue
+                
+                in_progress.add(post_url)
+                started += 1
+                attempt = retry_queue.attempts(post_url) + 1 if retry_queue is not None else 1
+                if attempt > 1:
+                    position = f"retry {attempt}/{retry_queue.max_attempts}"
+                elif frontier is not None:
+                    position = f"#{started}, {len(frontier)} queued"
+                else:
+                    position = f"{len(post_urls) - len(pending_urls)}/{len(post_urls)}"
+                label = f"[{position}] " if pool_size > 1 else ""
+                print(f"\n[{position}] (tab {tab_number}) Scraping post: {post_url}")
+                
+                existing = existing_posts.get(post_url) if existing_posts else None
+                metrics = PostMetrics(post_url, tab_number, attempt, "scrape" if existing is None else "refresh")
+                if recorder:
+                    recorder.reset()
+                if existing is None:
+                    result = await scrape_post(page, post_url, label, blocker, capture, metrics=metrics,
+                                               selector_stats=selector_stats)
+                else:
+                    result = await refresh_post(page, existing, label, blocker, capture, metrics, selector_stats)
+                results[post_url] = result
+                if metrics_log is not None:
+                    metrics_log.write(metrics, result)
+                if recorder and "error" not in result:
+                    print(f"{label}Saved snapshot to {await recorder.save(page, result)}")
+                
+                # A failed refresh or forced re-scrape leaves a successfully stored post as it was
+                if store is not None and not ("error" in result and (existing or store.has_success(post_url))):
+                    store.append(result)
+                
+                if retry_queue is not None and existing is None:
+                    if "error" not in result:
+                        retry_queue.record_success(post_url)
+                    elif retry_queue.record_failure(post_url, result["error"]):
+                        print(f"{label}Scheduled for retry (attempt {attempt + 1} of {retry_queue.max_attempts})")
+                    else:
+                        print(f"{label}Giving up after {attempt} failed attempts")
+                if frontier is not None:
+                    frontier.mark_done(post_url)
+                in_progress.discard(post_url)
+                if on_result:
+                    await on_result(result)
+                
+                # Small delay between posts
+                await asyncio.sleep(POST_DELAY_SECONDS)
+        finally:
+            await page.close()
+    
+    if frontier is not None:
+        tab_count = max(1, pool_size)
+    else:
+        tab_count = max(1, min(pool_size, len(post_urls) + (len(retry_queue) if retry_queue is not None else 0)))
+    await asyncio.gather(*(worker(tab_number + 1) for tab_number in range(tab_count)))
+    
+    return list(results.values())
+
+def select_urls_to_scrape(post_urls: List[str], store: PostStore) -> List[str]:
+    """Filter out duplicate URLs and posts that have already been scraped."""
+    unique_urls = dedupe_post_urls(post_urls)
+    if len(unique_urls) < len(post_urls):
+        print(f"Skipping {len(post_urls) - len(unique_urls)} duplicate URLs for the same posts")
+    return [url for url in unique_urls if url not in store]
 
-def scrape_individual_posts(post_urls: List[str]) -> List[Dict]:
+async def scrape_individual_posts_async(post_urls: List[str], pool_size: int = PAGE_POOL_SIZE,
+                                        metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
     """
-    Scrape comments from individual Facebook posts.
+    Scrape comments from individual Facebook posts using a pool of tabs.
     
     Args:
         post_urls: List of Facebook post URLs to scrape
+        pool_size: Number of tabs scraping at the same time
+        metrics_log: Log to write each post's stage timings and counters to
         
     Returns:
         List of dictionaries containing post data and comments
     """
-    # Check existing results to filter out already scraped URLs
-    existing_urls = set()
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                existing_results = json.load(f)
-                existing_urls = {result.get('url') for result in existing_results if result.get('url')}
-        except (json.JSONDecodeError, FileNotFoundError):
-            pass
+    # Check the post store to filter out already scraped URLs
+    store = PostStore(posts_log_path, file_path)
+    retry_queue = RetryQueue(retry_queue_path, RETRY_BASE_DELAY_SECONDS, RETRY_MAX_DELAY_SECONDS, RETRY_MAX_ATTEMPTS)
+    retry_queue.seed_from(store.posts())
     
-    # Filter out URLs that have already been scraped
-    urls_to_scrape = [url for url in post_urls if url not in existing_urls]
+    urls_to_scrape = select_urls_to_scrape(post_urls, store)
+    due_retries = len(retry_queue.due())
     
-    if not urls_to_scrape:
+    if not urls_to_scrape and not due_retries:
         print("All posts have already been scraped!")
+        if retry_queue:
+            print(f"{len(retry_queue)} failed posts are waiting for their next retry")
         return []
     
-    print(f"Found {len(existing_urls)} already scraped posts")
-    print(f"Will scrape {len(urls_to_scrape)} new posts")
+    print(f"Found {len(store)} already scraped posts")
+    print(f"Will scrape {len(urls_to_scrape)} new posts and retry {due_retries} failed posts "
+          f"using {min(pool_size, len(urls_to_scrape) + due_retries)} tab(s)")
 
-    results = []
+    selector_stats = SelectorStats(selector_stats_path, STALE_SELECTOR_POSTS) if ADAPTIVE_SELECTORS else None
     
-    with sync_playwright() as p:
-        context = p.chromium.launch_persistent_context(
-            user_data_dir=USER_DATA_DIR,
-            headless=HEADLESS_MODE,
-            args=['--disable-notifications']
-        )
-        page = context.new_page()
+    async with async_playwright() as p:
+        context, blocker = await launch_scraping_context(p)
+        try:
+            results = await scrape_posts_with_context(context, urls_to_scrape, pool_size, blocker, store,
+                                                      retry_queue=retry_queue, metrics_log=metrics_log,
+                                                      selector_stats=selector_stats,
+                                                      record_to=snapshots_dir if RECORD_SNAPSHOTS else None)
+        finally:
+            await context.close()
+    
+    if selector_stats:
+        selector_stats.print_stale_report()
+    
+    return results
+
+async def launch_scraping_context(p) -> Tuple[object, Optional[ResourceBlocker]]:
+    """
+    Launch the logged-in persistent browser context used for scraping.
+    
+    Args:
+        p: Started async Playwright instance
         
-        for idx, post_url in enumerate(urls_to_scrape):
-            print(f"\n[{idx + 1}/{len(post_urls)}] Scraping post: {post_url}")
-            
-            try:
-                # Navigate to the post
-                page.goto(post_url)
-                time.sleep(3)  # Wait for page to load
-                
-                # Try to expand "View more comments" if available
-                try:
-                    view_more_buttons = page.query_selector_all('div[role="button"]:has-text("View more comments")')
-                    for button in view_more_buttons:
-                        if button.is_visible():
-                            button.click()
-                            time.sleep(2)
-                            print("Clicked 'View more comments'")
-                except Exception as e:
-                    print(f"Could not click 'View more comments': {e}")
-                
-                # Scroll to load more comments
-                print(f"Scrolling to load more comments...")
-
-                # First, find the actual scrollable comment container
-                comment_container = page.query_selector('div[class="xb57i2i x1q594ok x5lxg6s x78zum5 xdt5ytf x6ikm8r x1ja2u2z x1pq812k x1rohswg xfk6m8 x1yqm8si xjx87ck xx8ngbg xwo3gff x1n2onr6 x1oyok0e x1odjw0f x1iyjqo2 xy5w88m"]')
-
-                for scroll_count in range(SCROLL_TIMES):
-                    if comment_container:
-                        # Check scroll capability
-                        # scroll_height = page.evaluate("(element) => element.scrollHeight", comment_container)
-                        # client_height = page.evaluate("(element) => element.clientHeight", comment_container)
-                        # print(f"Comment container - Scroll height: {scroll_height}, Client height: {client_height}")
-                        
-                        # Scroll within the comment container
-                        page.evaluate("""
-                            (element) => {
-                                element.scrollTop += 10000;
-                            }
-                        """, comment_container)
-                        print(f"Scrolled comment container {scroll_count + 1}/{SCROLL_TIMES}")
-                        time.sleep(1)
-                    else:
-                        # Fallback to page scroll
-                        page.mouse.wheel(0, 1000)
-                        print(f"Fallback scroll {scroll_count + 1}/{SCROLL_TIMES}")
-                
-                # Wait a bit after scrolling
-                time.sleep(2)
-                
-                # Extract post content
-                post_data = {
-                    "url": post_url,
-                    "post_text": "",
-                    "comments": [],
-                    "scraping_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                }
-                
-                # Try to get the main post text
-                try:
-                    # Multiple selectors for post content
-                    post_content_selectors = [
-                        'div[class="x1iorvi4 xjkvuk6 x1g0dm76 xpdmqnj"]',
-                        'div[dir="auto"][style="text-align: start;"]',
-                        '[data-ad-preview="message"]',
-                        'div[data-testid="post_message"]',
-                        'div[class*="userContent"]',
-                        'div[class*="x11i5rnm xat24cr x1mh8g0r x1vvkbs"]'  # Common post text container
-                    ]
-                    
-                    for selector in post_content_selectors:
-                        post_content_element = page.query_selector(selector)
-                        if post_content_element:
-                            post_data["post_text"] = post_content_element.inner_text().strip()
-                            break
-                    
-                    if not post_data["post_text"]:
-                        print("Could not extract main post text")
-                        
-                except Exception as e:
-                    print(f"Error extracting post text: {e}")
-                
-                # Extract comments using multiple selectors
-                comment_selectors = [
-                    'div[class*="xdj266r"][class*="x11i5rnm"][class*="xat24cr"]',  # Common comment container
-                    'div[data-testid="comment"]',
-                    'div[class*="comment"]',
-                    'div[aria-label*="Comment"]',
-                    'li[data-testid="comment"]'
-                ]
-                
-                all_comments = []
-                
-                for selector in comment_selectors:
-                    try:
-                        comment_elements = page.query_selector_all(selector)
-                        if comment_elements:                            
-                            for comment_element in comment_elements:
-                                try:
-                                    comment_text = comment_element.inner_text().strip()
-                                    
-                                    # Clean the comment text
-                                    cleaned_comment = clean_comment_text(comment_text)
-                                    
-                                    # Filter out empty comments and common noise
-                                    if (cleaned_comment and 
-                                        len(cleaned_comment) > 1 and  # Ensure meaningful content
-                                        not is_noise_comment(cleaned_comment)):  # Check if it's just noise
-                                        
-                                        all_comments.append(cleaned_comment)
-                                        
-                                except Exception as e:
-                                    print(f"Error extracting individual comment: {e}")
-                            
-                            # If we found comments with this selector, break
-                            if all_comments:
-                                break
-                                
-                    except Exception as e:
-                        print(f"Error with selector {selector}: {e}")
-                
-                # Remove duplicates while preserving order
-                seen = set()
-                unique_comments = []
-                for comment in all_comments:
-                    if comment not in seen:
-                        seen.add(comment)
-                        unique_comments.append(comment)
-                
-                post_data["comments"] = unique_comments
-                print(f"Extracted {len(unique_comments)} unique comments")
-                
-                results.append(post_data)
-                
-            except Exception as e:
-                print(f"Error scraping post {post_url}: {e}")
-                results.append({
-                    "url": post_url,
-                    "error": str(e),
-                    "scraping_timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-                })
-            
-            # Small delay between posts
-            time.sleep(2)
+    Returns:
+        Tuple of (browser context, resource blocker installed on it or None)
+    """
+    context = await p.chromium.launch_persistent_context(
+        user_data_dir=USER_DATA_DIR,
+        headless=HEADLESS_MODE,
+        args=['--disable-notifications']
+    )
+    
+    blocker = None
+    if BLOCK_RESOURCES:
+        blocker = ResourceBlocker(BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PATTERNS)
+        await blocker.install(context)
+    
+    return context, blocker
+
+async def refresh_posts_async(limit: int = REFRESH_LIMIT, pool_size: int = PAGE_POOL_SIZE,
+                              metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """
+    Revisit the most recently active scraped posts and merge in new comments.
+    
+    Args:
+        limit: Maximum number of posts to revisit
+        pool_size: Number of tabs scraping at the same time
+        metrics_log: Log to write each post's stage timings and counters to
         
-        context.close()
+    Returns:
+        List of refreshed post records (error dictionaries for failed revisits)
+    """
+    store = PostStore(posts_log_path, file_path)
+    posts_to_refresh = select_posts_for_refresh(store, limit, REFRESH_MIN_INTERVAL_HOURS)
+    
+    if not posts_to_refresh:
+        print("No posts are due for a refresh!")
+        return []
+    
+    print(f"Will refresh {len(posts_to_refresh)} of {len(store)} scraped posts")
+    existing_posts = {post["url"]: post for post in posts_to_refresh}
+    
+    selector_stats = SelectorStats(selector_stats_path, STALE_SELECTOR_POSTS) if ADAPTIVE_SELECTORS else None
+    
+    async with async_playwright() as p:
+        context, blocker = await launch_scraping_context(p)
+        try:
+            results = await scrape_posts_with_context(context, list(existing_posts), pool_size, blocker, store,
+                                                      existing_posts, metrics_log=metrics_log,
+                                                      selector_stats=selector_stats,
+                                                      record_to=snapshots_dir if RECORD_SNAPSHOTS else None)
+        finally:
+            await context.close()
+    
+    if selector_stats:
+        selector_stats.print_stale_report()
     
     return results
 
+def refresh_posts(limit: int = REFRESH_LIMIT, pool_size: int = PAGE_POOL_SIZE,
+                  metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """
+    Revisit already scraped posts and merge in their new comments.
+    
+    Args:
+        limit: Maximum number of posts to revisit
+        pool_size: Number of tabs scraping at the same time
+        metrics_log: Log to write each post's stage timings and counters to
+        
+    Returns:
+        List of refreshed post records
+    """
+    return asyncio.run(refresh_posts_async(limit, pool_size, metrics_log))
+
+def scrape_individual_posts(post_urls: List[str], pool_size: int = PAGE_POOL_SIZE,
+                            metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """
+    Scrape comments from individual Facebook posts.
+    
+    Args:
+        post_urls: List of Facebook post URLs to scrape
+        pool_size: Number of tabs scraping at the same time (1 = one post at a time)
+        metrics_log: Log to write each post's stage timings and counters to
+        
+    Returns:
+        List of dictionaries containing post data and comments
+    """
+    return asyncio.run(scrape_individual_posts_async(post_urls, pool_size, metrics_log))
+
+
 
 
 def print_summary(results: List[Dict]):
@@ -414,46 +852,38 @@ def manual_browse():
 
 def save_results_to_json(results: List[Dict], filename: str = file_path):
     """
-    Save results to JSON file, appending new posts to existing ones.
-    Skips posts that have already been scraped.
+    Commit new posts to the post store and export it to a JSON file.
+    Skips posts that have already been scraped, whatever form their URL takes.
+    
+    Posts scraped by scrape_individual_posts are already committed, so for
+    them this only refreshes the JSON export read by the analysis scripts.
     
     Args:
         results: List of scraped post data
         filename: Output filename
     """
     try:
-        # Load existing results
-        existing_results = []
-        existing_urls = set()
+        store = PostStore(posts_log_path, filename)
         
-        if os.path.exists(filename):
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    existing_results = json.load(f)
-                    existing_urls = {result.get('url') for result in existing_results if result.get('url')}
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                print(f"Warning: Could not load existing results from {filename}: {e}")
-        
-        # Filter out posts that have already been scraped
-        new_results = []
+        # Commit posts that aren't in the store yet
+        new_posts = 0
         for result in results:
             url = result.get('url')
-            if url not in existing_urls:
-                new_results.append(result)
+            if url not in store:
+                store.append(result)
+                new_posts += 1
                 print(f"New post added: {url}")
+            elif store.get(url) == result:
+                # Already committed while scraping
+                new_posts += 1
             else:
                 print(f"Skipped existing post: {url}")
         
-        # Combine existing and new results
-        all_results = existing_results + new_results
-        
-        # Save to file
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, ensure_ascii=False, indent=2)
+        total_posts = store.export_json(filename)
         
         print(f"\nResults saved to {filename}")
-        print(f"Total posts in file: {len(all_results)}")
-        print(f"New posts added: {len(new_results)}")
+        print(f"Total posts in file: {total_posts}")
+        print(f"New posts added: {new_posts}")
         
     except Exception as e:
         print(f"Error saving results: {e}")
@@ -473,17 +903,29 @@ if __name__ == "__main__":
         else:
             print(f"Found {len(POST_URLS)} post URLs to scrape")
         
-        mode = input("\nEnter 'auto' for automation, 'manual' to browse manually, or 'q' to quit: ").strip().lower()
+        mode = input("\nEnter 'auto' for automation, 'refresh' to update scraped posts, 'manual' to browse manually, or 'q' to quit: ").strip().lower()
         
         if mode in ['m', 'manual']:
             manual_browse()
+        elif mode in ['r', 'refresh']:
+            print("Refreshing already scraped posts...")
+            metrics_log = MetricsLog(metrics_path)
+            results = refresh_posts(metrics_log=metrics_log)
+            save_results_to_json(results)
+            if results:
+                print_summary(results)
+                print_stage_summary(metrics_log.records)
+            print("Refresh completed!")
         elif mode in ['a', 'auto']:
             print("Starting automatic scraping...")
-            results = scrape_individual_posts(POST_URLS)
+            metrics_log = MetricsLog(metrics_path)
+            results = scrape_individual_posts(POST_URLS, metrics_log=metrics_log)
             
+            # Export even when nothing is new, in case an earlier run crashed before exporting
+            save_results_to_json(results)
             if results:
-                save_results_to_json(results)
                 print_summary(results)
+                print_stage_summary(metrics_log.records)
             else:
                 print("No new posts to scrape or no results obtained.")
             
@@ -0,0 +1,36 @@
+import json
+import os
+from typing import Any
+
+def load_json(path: str, default: Any, description: str) -> Any:
+    """
+    Load a JSON file, falling back to default if it is missing or unreadable.
+
+    Args:
+        path: JSON file to read
+        default: Value returned when the file doesn't exist or can't be decoded
+        description: What the file holds, for the warning printed on a decoding error
+
+    Returns:
+        The decoded data, or default
+    """
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        print(f"Warning: Could not load {description} from {path}: {e}")
+        return default
+
+def save_json(path: str, data: Any):
+    """
+    Write data to a JSON file through a temporary file.
+
+    The temporary file replaces path in one step, so a crash mid-write
+    leaves the previous version in place instead of a truncated file.
+    """
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import weakref
+from typing import Dict
+
+from post_urls import post_key_string
+
+SNAPSHOTS_DIR = "Facebook Scraping/snapshots"
+
+# Snapshots are served without their scripts so the replayed page stays exactly as recorded;
+# JSON data blocks never run, so they are kept for the GraphQL comment capture
+SCRIPT_TAG_PATTERN = re.compile(r'<script\b(?![^>]*type="application/json")[^>]*>.*?</script\s*>',
+                                re.IGNORECASE | re.DOTALL)
+
+def asset_path(snapshots_dir: str, url: str) -> str:
+    """Return where a stylesheet shared by the snapshots is saved."""
+    return os.path.join(snapshots_dir, "assets", hashlib.sha1(url.encode('utf-8')).hexdigest() + ".css")
+
+def snapshot_name(url: str) -> str:
+    """Return the directory name a post's snapshot is saved under."""
+    return re.sub(r'[^\w.-]', '_', post_key_string(url))
+
+def load_snapshot(directory: str) -> Dict:
+    """
+    Load a saved snapshot.
+
+    Returns:
+        Dictionary with the recorded "result", rendered "html" and GraphQL "responses"
+    """
+    with open(os.path.join(directory, "result.json"), 'r', encoding='utf-8') as f:
+        result = json.load(f)
+    with open(os.path.join(directory, "page.html"), 'r', encoding='utf-8') as f:
+        html = f.read()
+
+    responses = []
+    responses_path = os.path.join(directory, "responses.jsonl")
+    if os.path.exists(responses_path):
+        with open(responses_path, 'r', encoding='utf-8') as f:
+            responses = [json.loads(line) for line in f if line.strip()]
+
+    return {"result": result, "html": html, "responses": responses}
+
+def list_snapshots(snapshots_dir: str = SNAPSHOTS_DIR) -> Dict[str, str]:
+    """Map the URL of every saved post to its snapshot directory."""
+    snapshots = {}
+    if not os.path.isdir(snapshots_dir):
+        return snapshots
+    for name in sorted(os.listdir(snapshots_dir)):
+        result_path = os.path.join(snapshots_dir, name, "result.json")
+        if os.path.exists(result_path):
+            with open(result_path, 'r', encoding='utf-8') as f:
+                snapshots[json.load(f)["url"]] = os.path.join(snapshots_dir, name)
+    return snapshots
+
+class SnapshotRecorder:
+    """
+    Saves post pages to disk while they are scraped.
+
+    Attached to a page like CommentCapture, it keeps the bodies of the
+    GraphQL responses the page receives. save() then writes them together
+    with the rendered HTML and the scrape result, which is everything
+    SnapshotReplayer and the replay benchmark need. Stylesheets are saved
+    once into a shared assets directory, since innerText depends on them.
+    """
+
+    def __init__(self, snapshots_dir: str = SNAPSHOTS_DIR):
+        self.snapshots_dir = snapshots_dir
+        self.responses = []
+        self.pending = set()
+        # Bumped by reset() so responses to requests of the previous post are dropped
+        self.generation = 0
+        self.request_generations = weakref.WeakKeyDictionary()
+
+    def attach(self, page):
+        """Start keeping the GraphQL responses of page."""
+        page.on("request", self.handle_request)
+        page.on("response", self.handle_response)
+
+    def reset(self):
+        """Forget the responses kept for the previous post."""
+        self.responses = []
+        self.generation += 1
+
+    def handle_request(self, request):
+        self.request_generations[request] = self.generation
+
+    def handle_response(self, response):
+        generation = self.request_generations.get(response.request, self.generation)
+        if response.request.resource_type == "stylesheet":
+            if os.path.exists(asset_path(self.snapshots_dir, response.url)):
+                return
+            reader = self._save_asset(response)
+        elif "/api/graphql" in response.url and generation == self.generation:
+            reader = self._read(response, generation)
+        else:
+            return
+        task = asyncio.ensure_future(reader)
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _read(self, response, generation):
+        try:
+            body = await response.text()
+        except Exception:
+            return
+        if generation != self.generation:
+            return
+        self.responses.append({
+            "url": response.url,
+            "status": response.status,
+            "content_type": response.headers.get("content-type", ""),
+            "body": body,
+        })
+
+    async def _save_asset(self, response):
+        try:
+            body = await response.text()
+        except Exception:
+            return
+        path = asset_path(self.snapshots_dir, response.url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+
+    async def save(self, page, result: Dict) -> str:
+        """
+        Save the post currently shown in page.
+
+        Args:
+            page: Playwright page the post was just scraped in
+            result: Post dictionary returned by the scraper
+
+        Returns:
+            Directory the snapshot was written to
+        """
+        if self.pending:
+            await asyncio.gather(*self.pending, return_exceptions=True)
+
+        directory = os.path.join(self.snapshots_dir, snapshot_name(result["url"]))
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, "page.html"), 'w', encoding='utf-8') as f:
+            f.write(await page.content())
+        with open(os.path.join(directory, "responses.jsonl"), 'w', encoding='utf-8') as f:
+            for response in self.responses:
+                f.write(json.dumps(response, ensure_ascii=False) + "\n")
+        with open(os.path.join(directory, "result.json"), 'w', encoding='utf-8') as f:
+            json.dump(dict(result, recorded_at=time.strftime("%Y-%m-%d %H:%M:%S")), f, ensure_ascii=False, indent=2)
+
+        return directory
+
+class SnapshotReplayer:
+    """
+    Route handler that serves saved snapshots in place of Facebook.
+
+    Navigations to a recorded post are answered with its rendered HTML
+    (scripts removed) and recorded stylesheets are served from the assets
+    directory; every other request is aborted, so a replay needs no network
+    and no login and always sees the same page. Without scripts the page
+    never requests /api/graphql, so the recorded GraphQL responses are
+    appended to the document as JSON data blocks, where CommentCapture
+    reads them like the JSON Facebook embeds in a post.
+    """
+
+    def __init__(self, snapshots_dir: str = SNAPSHOTS_DIR):
+        self.snapshots_dir = snapshots_dir
+        recorded = list_snapshots(snapshots_dir)
+        self.urls = list(recorded)
+        self.snapshots = {post_key_string(url): directory for url, directory in recorded.items()}
+        self.pages = {}
+
+    async def install(self, context):
+        """Start answering the requests of the context from the snapshots."""
+        await context.route("**/*", self.handle_route)
+
+    def _page_html(self, directory: str) -> str:
+        if directory not in self.pages:
+            snapshot = load_snapshot(directory)
+            # "</" only occurs inside JSON strings, where "<\/" decodes to the same text
+            bodies = [response["body"].replace("</", "<\\/") for response in snapshot["responses"]]
+            blocks = "".join(f'<script type="application/json">{body}</script>' for body in bodies)
+            self.pages[directory] = SCRIPT_TAG_PATTERN.sub('', snapshot["html"]) + blocks
+        return self.pages[directory]
+
+    async def handle_route(self, route):
+        request = route.request
+        directory = self.snapshots.get(post_key_string(request.url))
+        if request.resource_type == "document" and directory:
+            await route.fulfill(status=200, content_type="text/html; charset=utf-8", body=self._page_html(directory))
+            return
+
+        stylesheet = asset_path(self.snapshots_dir, request.url)
+        if request.resource_type == "stylesheet" and os.path.exists(stylesheet):
+            await route.fulfill(status=200, content_type="text/css; charset=utf-8", path=stylesheet)
+            return
+
+        await route.abort()
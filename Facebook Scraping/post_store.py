@@ -0,0 +1,163 @@
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from json_files import load_json, save_json
+from post_urls import post_key_string
+
+POSTS_LOG_PATH = "Facebook Scraping/scraped_posts.jsonl"
+POSTS_JSON_PATH = "Facebook Scraping/scraped_posts.json"
+
+def import_rank(post: Dict) -> Tuple[bool, int]:
+    """Rank duplicate copies of a post: successful scrapes first, then by comment count."""
+    return "error" not in post, len(post.get("comments", []))
+
+class PostStore:
+    """
+    Append-only JSON Lines store for scraped posts.
+
+    Every post is written as one line and flushed to disk as soon as it is
+    scraped, so a crash only loses the post in progress. An in-memory index
+    maps each post's id to the offset of its latest line, so every URL form
+    of a post finds the same record; writing a post that is already stored
+    supersedes the older line. export_json writes the list layout of
+    scraped_posts.json that the analysis scripts read.
+    """
+
+    def __init__(self, path: str = POSTS_LOG_PATH, legacy_json_path: Optional[str] = POSTS_JSON_PATH):
+        """
+        Args:
+            path: JSON Lines file to append posts to
+            legacy_json_path: scraped_posts.json to import when the log doesn't exist yet
+        """
+        self.path = path
+        self.offsets = {}
+
+        if not os.path.exists(path) and legacy_json_path and os.path.exists(legacy_json_path):
+            self._import_json(legacy_json_path)
+
+        self._load_index()
+
+    def _import_json(self, json_path: str):
+        posts = load_json(json_path, None, "existing results")
+        if posts is None:
+            return
+
+        # Of duplicate copies of a post keep a successful one with the most comments,
+        # in the position of the first copy
+        best = {}
+        for post in posts:
+            if post.get('url'):
+                key = post_key_string(post['url'])
+                if key not in best or import_rank(post) > import_rank(best[key]):
+                    best[key] = post
+
+        # Write to a temporary file so an interrupted import is simply redone
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for post in best.values():
+                f.write(json.dumps(post, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.path)
+        print(f"Imported {len(best)} posts from {json_path} into {self.path}"
+              f"{f' ({len(posts) - len(best)} duplicate copies dropped)' if len(posts) > len(best) else ''}")
+
+    def _load_index(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, 'rb+') as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # A crash mid-write left a partial line; drop it so appends stay valid
+                    f.truncate(offset)
+                    print(f"Warning: Dropped an incomplete record at the end of {self.path}")
+                    break
+                try:
+                    url = json.loads(line).get('url')
+                except json.JSONDecodeError:
+                    url = None
+                if url:
+                    self.offsets[post_key_string(url)] = offset
+                offset += len(line)
+
+    def __contains__(self, url: str) -> bool:
+        return post_key_string(url) in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the latest stored record for the post url points at, or None."""
+        offset = self.offsets.get(post_key_string(url))
+        if offset is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def has_success(self, url: str) -> bool:
+        """Check if the latest stored record for the post url points at is a successful scrape."""
+        post = self.get(url)
+        return post is not None and "error" not in post
+
+    def append(self, post: Dict):
+        """
+        Commit a post to disk.
+
+        Args:
+            post: Scraped post dictionary; must have a "url"
+        """
+        line = (json.dumps(post, ensure_ascii=False) + "\n").encode('utf-8')
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self.offsets[post_key_string(post['url'])] = offset
+
+    def posts(self) -> List[Dict]:
+        """
+        Return the latest record of every stored post.
+
+        Posts keep the position of their first line, so rewriting a post
+        doesn't move it to the end of the export.
+        """
+        if not os.path.exists(self.path):
+            return []
+
+        latest_offsets = set(self.offsets.values())
+        first_seen = {}
+        latest = {}
+        with open(self.path, 'rb') as f:
+            offset = 0
+            for line in f:
+                try:
+                    post = json.loads(line)
+                except json.JSONDecodeError:
+                    post = {}
+                url = post.get('url')
+                if url:
+                    key = post_key_string(url)
+                    first_seen.setdefault(key, len(first_seen))
+                    if offset in latest_offsets:
+                        latest[key] = post
+                offset += len(line)
+
+        return [latest[key] for key in sorted(latest, key=first_seen.get)]
+
+    def export_json(self, filename: str = POSTS_JSON_PATH) -> int:
+        """
+        Write all stored posts to a JSON file in the scraped_posts.json layout.
+
+        Args:
+            filename: Output filename
+
+        Returns:
+            Number of posts written
+        """
+        posts = self.posts()
+        save_json(filename, posts)
+        return len(posts)
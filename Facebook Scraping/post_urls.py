@@ -0,0 +1,73 @@
+import re
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+# /groups/<group>/posts/<post> and /groups/<group>/permalink/<post>
+GROUP_POST_PATH_PATTERN = re.compile(r'^/groups/([^/]+)/(?:posts|permalink)/(\d+)')
+
+# /groups/<group>/?multi_permalinks=<post>
+GROUP_PATH_PATTERN = re.compile(r'^/groups/([^/]+)/?$')
+
+def post_key(url: str) -> Optional[Tuple[str, str]]:
+    """
+    Extract the (group id, post id) pair that identifies a Facebook group post.
+
+    Handles the /posts/ and /permalink/ paths, with or without a trailing
+    slash, query string or fragment, as well as multi_permalinks links.
+
+    Args:
+        url: Facebook post URL
+
+    Returns:
+        Tuple of (group id, post id), or None if the URL isn't a group post
+    """
+    parsed = urlparse(url.strip())
+    query = parse_qs(parsed.query)
+
+    match = GROUP_POST_PATH_PATTERN.match(parsed.path)
+    if match:
+        return match.group(1), match.group(2)
+
+    match = GROUP_PATH_PATTERN.match(parsed.path)
+    if match and query.get('multi_permalinks'):
+        return match.group(1), query['multi_permalinks'][0].split(',')[0]
+
+    return None
+
+def post_key_string(url: str) -> str:
+    """
+    Return a string key for a post URL, usable as a dictionary or JSON key.
+
+    Group posts map to their post id alone: post ids are unique across
+    Facebook, while a group can be written as its slug or its numeric id,
+    so links to the same post from both forms get the same key. Any other
+    URL is its own key.
+    """
+    key = post_key(url)
+    return key[1] if key else url.strip()
+
+def canonical_post_url(url: str) -> str:
+    """Rewrite a group post URL into the https://www.facebook.com/groups/<group>/posts/<post>/ form."""
+    key = post_key(url)
+    if not key:
+        return url.strip()
+    return f"https://www.facebook.com/groups/{key[0]}/posts/{key[1]}/"
+
+def dedupe_post_urls(urls: List[str]) -> List[str]:
+    """
+    Drop URLs that point at a post already in the list.
+
+    Args:
+        urls: Facebook post URLs, possibly in several forms
+
+    Returns:
+        The first URL seen for each post, in the original order
+    """
+    seen_keys = set()
+    unique_urls = []
+    for url in urls:
+        key = post_key_string(url)
+        if key not in seen_keys:
+            seen_keys.add(key)
+            unique_urls.append(url)
+    return unique_urls
@@ -0,0 +1,105 @@
+import re
+from typing import Dict, Iterable, Optional
+
+# Rough transfer sizes used to estimate what a blocked request would have cost,
+# since an aborted request never reports its real size
+ESTIMATED_RESOURCE_BYTES = {
+    "image": 45_000,
+    "media": 750_000,
+    "font": 60_000,
+    "script": 35_000,
+    "stylesheet": 20_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+    "other": 5_000,
+}
+
+def empty_stats() -> Dict:
+    """Create an empty set of per-post request counters."""
+    return {
+        "blocked_requests": 0,
+        "blocked_by_type": {},
+        "estimated_bytes_saved": 0,
+        "allowed_requests": 0,
+        "bytes_loaded": 0,
+    }
+
+class ResourceBlocker:
+    """
+    Route filter that aborts requests the text extraction never uses.
+
+    Installed once on the browser context, it blocks requests by resource type
+    (images, media, fonts, ...) or URL pattern (trackers, ...) and keeps
+    counters per page so each post can report what was saved.
+    """
+
+    def __init__(self, resource_types: Iterable[str], url_patterns: Iterable[str]):
+        """
+        Args:
+            resource_types: Playwright resource types to abort, e.g. "image"
+            url_patterns: Regular expressions; matching request URLs are aborted
+        """
+        self.resource_types = frozenset(resource_types)
+        url_patterns = list(url_patterns)
+        self.url_pattern = re.compile("|".join(f"(?:{p})" for p in url_patterns)) if url_patterns else None
+        self.stats = {}
+
+    async def install(self, context):
+        """Start filtering every request made by the context."""
+        await context.route("**/*", self.handle_route)
+        context.on("response", self.record_response)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Check if a request is for a resource that should be aborted."""
+        if resource_type in self.resource_types:
+            return True
+        return bool(self.url_pattern and self.url_pattern.search(url))
+
+    def reset(self, page):
+        """Start a fresh set of counters for the next post loaded in page."""
+        self.stats[page] = empty_stats()
+
+    def pop_stats(self, page) -> Dict:
+        """Return and clear the counters collected for page."""
+        return self.stats.pop(page, empty_stats())
+
+    def _stats_for(self, request) -> Optional[Dict]:
+        # Service worker requests have no frame, so they can't be tied to a post
+        try:
+            page = request.frame.page
+        except Exception:
+            return None
+        return self.stats.get(page)
+
+    async def handle_route(self, route):
+        request = route.request
+        stats = self._stats_for(request)
+
+        if self.should_block(request.resource_type, request.url):
+            if stats is not None:
+                resource_type = request.resource_type
+                stats["blocked_requests"] += 1
+                stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+                stats["estimated_bytes_saved"] += ESTIMATED_RESOURCE_BYTES.get(resource_type, ESTIMATED_RESOURCE_BYTES["other"])
+            await route.abort()
+            return
+
+        if stats is not None:
+            stats["allowed_requests"] += 1
+        await route.fallback()
+
+    def record_response(self, response):
+        stats = self._stats_for(response.request)
+        if stats is None:
+            return
+        try:
+            stats["bytes_loaded"] += int(response.headers.get("content-length", 0))
+        except ValueError:
+            pass
+
+def format_stats(stats: Dict) -> str:
+    """Format per-post request counters as a one-line report."""
+    by_type = ", ".join(f"{count} {resource_type}" for resource_type, count in sorted(stats["blocked_by_type"].items()))
+    return (f"Blocked {stats['blocked_requests']} requests ({by_type or 'none'}), "
+            f"~{stats['estimated_bytes_saved'] / 1024:.0f} KB saved; "
+            f"loaded {stats['allowed_requests']} requests, {stats['bytes_loaded'] / 1024:.0f} KB")
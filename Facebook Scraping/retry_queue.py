@@ -0,0 +1,119 @@
+import time
+from typing import Dict, List, Optional
+
+from json_files import load_json, save_json
+from post_urls import post_key_string
+
+RETRY_QUEUE_PATH = "Facebook Scraping/retry_queue.json"
+
+class RetryQueue:
+    """
+    Persistent queue of failed posts waiting to be scraped again.
+
+    Each failure pushes the post's next attempt further out with exponential
+    backoff. After max_attempts failures the post is given up on and its
+    error record stays final. The queue is saved to a small JSON file after
+    every change so it survives crashes and carries over between runs.
+    """
+
+    def __init__(self, path: str = RETRY_QUEUE_PATH, base_delay: float = 60, max_delay: float = 6 * 3600,
+                 max_attempts: int = 5):
+        """
+        Args:
+            path: JSON file the queue is kept in
+            base_delay: Seconds to wait before the first retry
+            max_delay: Upper bound on the wait between two attempts
+            max_attempts: Failures after which a post is given up on
+        """
+        self.path = path
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+        # Key by the current post_key_string, which older files may not use
+        entries = load_json(path, {}, "retry queue")
+        self.entries = {post_key_string(entry["url"]): entry for entry in entries.values()}
+
+    def _save(self):
+        save_json(self.path, self.entries)
+
+    def __contains__(self, url: str) -> bool:
+        """Check if a post is waiting to be retried (and hasn't been given up on)."""
+        entry = self.entries.get(post_key_string(url))
+        return entry is not None and not entry["gave_up"]
+
+    def __len__(self) -> int:
+        return sum(1 for entry in self.entries.values() if not entry["gave_up"])
+
+    def attempts(self, url: str) -> int:
+        """Return how many times scraping a post has failed so far."""
+        entry = self.entries.get(post_key_string(url))
+        return entry["attempts"] if entry else 0
+
+    def record_failure(self, url: str, error: str, now: Optional[float] = None) -> bool:
+        """
+        Schedule a failed post for another attempt.
+
+        Args:
+            url: URL of the post that failed
+            error: Error message of the failure
+            now: Current time (defaults to time.time())
+
+        Returns:
+            True if the post will be retried, False if it has been given up on
+        """
+        now = time.time() if now is None else now
+        key = post_key_string(url)
+        entry = self.entries.get(key) or {"url": url, "attempts": 0}
+
+        entry["attempts"] += 1
+        entry["last_error"] = error
+        entry["gave_up"] = entry["attempts"] >= self.max_attempts
+        delay = min(self.base_delay * 2 ** (entry["attempts"] - 1), self.max_delay)
+        entry["next_attempt_at"] = now + delay
+
+        self.entries[key] = entry
+        self._save()
+        return not entry["gave_up"]
+
+    def record_success(self, url: str):
+        """Remove a post from the queue once it has been scraped."""
+        if self.entries.pop(post_key_string(url), None) is not None:
+            self._save()
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """Return the URLs whose next attempt is due, longest waiting first."""
+        now = time.time() if now is None else now
+        ready = [
+            entry for entry in self.entries.values()
+            if not entry["gave_up"] and entry["next_attempt_at"] <= now
+        ]
+        ready.sort(key=lambda entry: entry["next_attempt_at"])
+        return [entry["url"] for entry in ready]
+
+    def seconds_until_next(self, now: Optional[float] = None) -> Optional[float]:
+        """Return how long until the next retry is due, or None if nothing is waiting."""
+        now = time.time() if now is None else now
+        waiting = [entry["next_attempt_at"] for entry in self.entries.values() if not entry["gave_up"]]
+        return max(0.0, min(waiting) - now) if waiting else None
+
+    def seed_from(self, posts: List[Dict]):
+        """
+        Queue stored error records that the queue doesn't know about yet.
+
+        Posts that failed before the retry queue existed were counted as
+        scraped forever; this gives them their remaining attempts.
+        """
+        added = 0
+        for post in posts:
+            if "error" in post and post_key_string(post["url"]) not in self.entries:
+                self.entries[post_key_string(post["url"])] = {
+                    "url": post["url"],
+                    "attempts": 1,
+                    "last_error": post["error"],
+                    "gave_up": self.max_attempts <= 1,
+                    "next_attempt_at": 0,
+                }
+                added += 1
+        if added:
+            self._save()
+            print(f"Queued {added} previously failed posts for retry")
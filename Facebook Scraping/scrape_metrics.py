@@ -0,0 +1,149 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+METRICS_PATH = "Facebook Scraping/scrape_metrics.jsonl"
+
+# Stages in the order a post goes through them
+STAGES = ["navigation", "expand_comments", "scroll", "graphql_drain", "extraction", "cleaning"]
+
+class PostMetrics:
+    """
+    Timing spans and counters collected while scraping one post.
+
+    Stages are timed with span(); timing the same stage twice (e.g. the
+    extraction cascade asking the page again) adds up the durations.
+    """
+
+    def __init__(self, url: str, tab: int = 1, attempt: int = 1, mode: str = "scrape"):
+        self.url = url
+        self.tab = tab
+        self.attempt = attempt
+        self.mode = mode
+        self.started_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.start = time.perf_counter()
+        self.stages = {}
+        self.counters = {}
+
+    @contextmanager
+    def span(self, stage: str):
+        """Time the code inside the with block as part of stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - start
+
+    def count(self, name: str, value):
+        """Set a counter, e.g. the number of comments found or the selector used."""
+        self.counters[name] = value
+
+    def to_record(self, result: Dict) -> Dict:
+        """Build the metrics line for a post from its scrape result."""
+        record = {
+            "url": self.url,
+            "mode": self.mode,
+            "tab": self.tab,
+            "attempt": self.attempt,
+            "started_at": self.started_at,
+            "total_seconds": round(time.perf_counter() - self.start, 3),
+            "stages": {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+            "counters": self.counters,
+            "ok": "error" not in result,
+        }
+        if "error" in result:
+            record["error"] = result["error"]
+        return record
+
+class MetricsLog:
+    """
+    Append-only JSON Lines file of per-post scrape metrics.
+
+    Every run appends to the same file so runs with different settings
+    (pool size, wait mode, resource blocking) can be compared later. The
+    records of the current run are also kept in memory for the summary;
+    with no path they are only kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = METRICS_PATH):
+        self.path = path
+        self.records = []
+
+    def write(self, metrics: PostMetrics, result: Dict):
+        """Record the metrics of a finished post."""
+        self.add(metrics.to_record(result))
+
+    def add(self, record: Dict):
+        """Record a metrics line built elsewhere, e.g. in a worker process."""
+        self.records.append(record)
+        if self.path:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Return the nearest-rank percentile of values, or None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+def load_metrics(path: str = METRICS_PATH) -> List[Dict]:
+    """Read every metrics record from a metrics file."""
+    records = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return records
+
+def print_stage_summary(records: List[Dict]):
+    """Print p50/p95 timings per stage and the totals of the main counters."""
+    if not records:
+        print("No metrics to summarize.")
+        return
+
+    print(f"\n{'='*50}")
+    print("STAGE TIMINGS (seconds)")
+    print(f"{'='*50}")
+    print(f"{'stage':<18}{'runs':>6}{'p50':>9}{'p95':>9}{'total':>10}")
+
+    stage_names = STAGES + sorted({stage for r in records for stage in r["stages"]} - set(STAGES))
+    for stage in stage_names + ["total"]:
+        if stage == "total":
+            values = [r["total_seconds"] for r in records]
+        else:
+            values = [r["stages"][stage] for r in records if stage in r["stages"]]
+        if values:
+            print(f"{stage:<18}{len(values):>6}{percentile(values, 0.5):>9.2f}"
+                  f"{percentile(values, 0.95):>9.2f}{sum(values):>10.1f}")
+
+    failed = len([r for r in records if not r["ok"]])
+    retries = len([r for r in records if r["attempt"] > 1])
+    comments = sum(r["counters"].get("comments", 0) for r in records)
+    print(f"Scrape attempts: {len(records)} ({failed} failed, {retries} retries), comments: {comments}")
+
+    bytes_loaded = [r["counters"]["bytes_loaded"] for r in records if "bytes_loaded" in r["counters"]]
+    if bytes_loaded:
+        print(f"Bytes loaded per post: p50 {percentile(bytes_loaded, 0.5) / 1024:.0f} KB, "
+              f"p95 {percentile(bytes_loaded, 0.95) / 1024:.0f} KB")
+
+    selectors = {}
+    for r in records:
+        selector = r["counters"].get("comment_selector")
+        if selector:
+            selectors[selector] = selectors.get(selector, 0) + 1
+    for selector, count in sorted(selectors.items(), key=lambda item: -item[1]):
+        print(f"Comment selector used {count}x: {selector}")
+
+    print(f"{'='*50}")
+
+if __name__ == "__main__":
+    print_stage_summary(load_metrics())
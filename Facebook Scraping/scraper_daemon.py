@@ -0,0 +1,223 @@
+"""
+Long-lived scraper service that keeps the logged-in browser warm.
+
+Starting Chromium with the persistent session takes several seconds per
+run. The daemon launches it once and then takes jobs over a local socket,
+so a small ad-hoc scrape starts as soon as a tab opens. Requests and
+replies are JSON Lines: the client sends one request and the daemon
+streams one reply per scraped post, then a final "done" message.
+
+Usage:
+    python "Facebook Scraping/scraper_daemon.py" serve
+    python "Facebook Scraping/scraper_daemon.py" scrape URL [URL ...] [--force]
+    python "Facebook Scraping/scraper_daemon.py" open URL
+    python "Facebook Scraping/scraper_daemon.py" stop
+"""
+import asyncio
+import json
+import os
+import sys
+from typing import AsyncIterator, Dict, List
+
+from playwright.async_api import async_playwright
+
+import individual_post_scraper as scraper
+from post_store import PostStore
+from post_urls import dedupe_post_urls
+from scrape_metrics import MetricsLog
+from selector_stats import SelectorStats
+
+DAEMON_HOST = "127.0.0.1"  # Only accept jobs from this machine
+DAEMON_PORT = 8765
+STREAM_LIMIT = 64 * 1024 * 1024  # A post with thousands of comments is one long line
+
+async def send(writer, message: Dict):
+    writer.write((json.dumps(message, ensure_ascii=False) + "\n").encode('utf-8'))
+    await writer.drain()
+
+class ScraperDaemon:
+    """
+    Serves scrape jobs from one warm persistent browser context.
+
+    Jobs run one at a time so the number of open tabs (and the request rate
+    Facebook sees) stays at the configured pool size. Every job is scraped
+    exactly like a run of individual_post_scraper.py: posts are committed to
+    the post store as they finish and the JSON export is refreshed at the
+    end. Failed posts are stored as error records, which the next regular
+    run picks up for retrying.
+    """
+
+    def __init__(self, host: str = DAEMON_HOST, port: int = DAEMON_PORT, pool_size: int = scraper.PAGE_POOL_SIZE):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.context = None
+        self.blocker = None
+        self.lock = None
+        self.stopped = None
+        self.metrics_log = MetricsLog(scraper.metrics_path)
+        self.selector_stats = (SelectorStats(scraper.selector_stats_path, scraper.STALE_SELECTOR_POSTS)
+                               if scraper.ADAPTIVE_SELECTORS else None)
+
+    async def serve(self):
+        """Launch the browser and take jobs until stopped or the browser is closed."""
+        self.lock = asyncio.Lock()
+        self.stopped = asyncio.Event()
+        async with async_playwright() as p:
+            self.context, self.blocker = await scraper.launch_scraping_context(p)
+            self.context.on("close", lambda _: self.stopped.set())
+
+            server = await asyncio.start_server(self.handle_client, self.host, self.port, limit=STREAM_LIMIT)
+            print(f"Scraper daemon listening on {self.host}:{self.port}")
+            async with server:
+                await self.stopped.wait()
+
+            print("Scraper daemon stopping")
+            try:
+                await self.context.close()
+            except Exception:
+                pass
+
+    async def handle_client(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline())
+            command = request.get("command", "scrape")
+
+            if command == "scrape":
+                await self.run_job(request, writer)
+            elif command == "open":
+                # Manual browsing in the warm session, left open for the user
+                page = await self.context.new_page()
+                await page.goto(request["url"])
+                await send(writer, {"type": "done"})
+            elif command == "ping":
+                await send(writer, {"type": "pong", "busy": self.lock.locked()})
+            elif command == "shutdown":
+                await send(writer, {"type": "done"})
+                self.stopped.set()
+            else:
+                await send(writer, {"type": "error", "error": f"Unknown command: {command}"})
+        except (json.JSONDecodeError, KeyError) as e:
+            await send(writer, {"type": "error", "error": f"Invalid request: {e}"})
+        except ConnectionError:
+            print("Client disconnected before its job finished")
+        except Exception as e:
+            # Tell the client instead of leaving it with a closed connection and no reply
+            print(f"Request failed: {e}")
+            try:
+                await send(writer, {"type": "error", "error": str(e)})
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def run_job(self, request: Dict, writer):
+        """
+        Scrape the URLs of a job and stream every result back to the client.
+
+        Args:
+            request: {"urls": [...], "force": bool}; force re-scrapes stored posts
+            writer: Stream to the client
+        """
+        async with self.lock:
+            store = PostStore(scraper.posts_log_path, scraper.file_path)
+            urls = request["urls"]
+            if request.get("force"):
+                urls_to_scrape = dedupe_post_urls(urls)
+            else:
+                urls_to_scrape = scraper.select_urls_to_scrape(urls, store)
+            await send(writer, {"type": "accepted", "urls": len(urls_to_scrape),
+                                "skipped": len(urls) - len(urls_to_scrape)})
+
+            async def stream(result: Dict):
+                # A client that went away doesn't stop the job; its posts are still stored
+                if not writer.is_closing():
+                    try:
+                        await send(writer, {"type": "result", "post": result})
+                    except ConnectionError:
+                        writer.close()
+
+            results = await scraper.scrape_posts_with_context(
+                self.context, urls_to_scrape, self.pool_size, self.blocker, store,
+                metrics_log=self.metrics_log, selector_stats=self.selector_stats, on_result=stream
+            )
+            if results:
+                store.export_json(scraper.file_path)
+
+            await send(writer, {"type": "done", "scraped": len(results),
+                                "failed": len([r for r in results if "error" in r])})
+
+async def request_daemon(request: Dict, host: str = DAEMON_HOST, port: int = DAEMON_PORT) -> AsyncIterator[Dict]:
+    """Send a request to the daemon and yield its replies as they arrive."""
+    reader, writer = await asyncio.open_connection(host, port, limit=STREAM_LIMIT)
+    try:
+        await send(writer, request)
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            yield json.loads(line)
+    finally:
+        writer.close()
+
+async def scrape_with_daemon_async(urls: List[str], force: bool = False,
+                                   host: str = DAEMON_HOST, port: int = DAEMON_PORT) -> List[Dict]:
+    """
+    Scrape posts through a running daemon.
+
+    Args:
+        urls: Facebook post URLs to scrape
+        force: Scrape posts again even if they are already stored
+
+    Returns:
+        List of post dictionaries, in the order they finished
+    """
+    results = []
+    async for reply in request_daemon({"command": "scrape", "urls": urls, "force": force}, host, port):
+        if reply["type"] == "accepted":
+            print(f"Daemon accepted {reply['urls']} posts ({reply['skipped']} already scraped or duplicates)")
+        elif reply["type"] == "result":
+            post = reply["post"]
+            results.append(post)
+            if "error" in post:
+                print(f"❌ {post['url']}: {post['error']}")
+            else:
+                print(f"✅ {post['url']}: {len(post['comments'])} comments")
+        elif reply["type"] == "error":
+            print(f"Daemon error: {reply['error']}")
+    return results
+
+def scrape_with_daemon(urls: List[str], force: bool = False) -> List[Dict]:
+    """Synchronous wrapper around scrape_with_daemon_async."""
+    return asyncio.run(scrape_with_daemon_async(urls, force))
+
+async def send_command(command: Dict):
+    async for reply in request_daemon(command):
+        if reply["type"] == "error":
+            print(f"Daemon error: {reply['error']}")
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    args = [arg for arg in sys.argv[2:] if arg != "--force"]
+
+    try:
+        if command == "serve":
+            if not os.path.exists(scraper.USER_DATA_DIR):
+                print("Please run your login script first to create a session.")
+                return
+            asyncio.run(ScraperDaemon().serve())
+        elif command == "scrape" and args:
+            results = scrape_with_daemon(args, force="--force" in sys.argv)
+            if results:
+                scraper.print_summary(results)
+        elif command == "open" and args:
+            asyncio.run(send_command({"command": "open", "url": args[0]}))
+        elif command == "stop":
+            asyncio.run(send_command({"command": "shutdown"}))
+        else:
+            print(__doc__)
+    except ConnectionRefusedError:
+        print(f"No scraper daemon is running on {DAEMON_HOST}:{DAEMON_PORT}; start one with the 'serve' command.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+from typing import Dict, List, Optional
+
+from json_files import load_json, save_json
+
+SELECTOR_STATS_PATH = "Facebook Scraping/selector_stats.json"
+RECENT_WEIGHT = 0.3  # Weight of the latest try in a selector's decayed hit rate
+
+class SelectorStats:
+    """
+    Persistent record of which selectors matched, per group.
+
+    For every group and kind of selector ("post" or "comment") it counts the
+    posts extracted and, per selector, how many of them it matched, at
+    which post it last did, how many times in a row it was tried without
+    matching, and a decayed hit rate ("score") over the posts it was tried
+    on. order() puts the selectors with the best recent hit rate for a
+    group first, so the extraction cascade finds them without trying the
+    slower generic fallbacks; after a layout change a selector that stopped
+    matching drops down within a few posts, however many hits it collected
+    before. Because the cascade stops at the first match,
+    selectors ranked below the winner are never tried; only misses of
+    selectors that were actually tried count. A selector that used to match
+    but was tried and missed stale_after times in a row is reported as
+    stale, which usually means Facebook changed its markup.
+    """
+
+    def __init__(self, path: str = SELECTOR_STATS_PATH, stale_after: int = 10, recent_weight: float = RECENT_WEIGHT):
+        """
+        Args:
+            path: JSON file the statistics are kept in
+            stale_after: Tries in a row a selector must miss to be reported as stale
+            recent_weight: Weight of the latest try in the decayed hit rate order() ranks by
+        """
+        self.path = path
+        self.stale_after = stale_after
+        self.recent_weight = recent_weight
+        self.groups = load_json(path, {}, "selector statistics")
+
+    def _save(self):
+        save_json(self.path, self.groups)
+
+    def _scores(self, kind: str, group: Optional[str] = None) -> Dict[str, float]:
+        scores = {}
+        for group_name, kinds in self.groups.items():
+            if group is not None and group_name != group:
+                continue
+            for selector, stats in kinds.get(kind, {}).get("selectors", {}).items():
+                # Statistics saved before scores were kept start from whether the selector ever matched
+                score = stats.get("score", 1.0 if stats["hits"] else 0.0)
+                scores[selector] = scores.get(selector, 0.0) + score
+        return scores
+
+    def order(self, kind: str, group: str, selectors: List[str]) -> List[str]:
+        """
+        Order selectors by their recent hit rate for a group.
+
+        Ties (and groups seen for the first time) fall back to the scores
+        summed across all groups, then to the configured order.
+
+        Args:
+            kind: "post" or "comment"
+            group: Group id of the post about to be extracted
+            selectors: Selectors in their configured order
+
+        Returns:
+            The same selectors, recently winning ones first
+        """
+        group_scores = self._scores(kind, group)
+        all_scores = self._scores(kind)
+        position = {selector: index for index, selector in enumerate(selectors)}
+        return sorted(selectors, key=lambda s: (-group_scores.get(s, 0.0), -all_scores.get(s, 0.0), position[s]))
+
+    def record(self, kind: str, group: str, matched: Optional[str], tried: List[str]):
+        """
+        Record which selector matched for one post.
+
+        Args:
+            kind: "post" or "comment"
+            group: Group id of the post
+            matched: Selector that matched, or None if none did
+            tried: Selectors the cascade evaluated, including the one that matched
+        """
+        stats = self.groups.setdefault(group, {}).setdefault(kind, {"posts": 0, "selectors": {}})
+        stats["posts"] += 1
+        for selector in tried:
+            selector_stats = stats["selectors"].setdefault(selector, {"hits": 0, "last_hit": 0})
+            score = selector_stats.get("score", 1.0 if selector_stats["hits"] else 0.0)
+            hit = 1.0 if selector == matched else 0.0
+            selector_stats["score"] = round(score + self.recent_weight * (hit - score), 4)
+            if selector == matched:
+                selector_stats["hits"] += 1
+                selector_stats["last_hit"] = stats["posts"]
+                selector_stats["misses"] = 0
+            else:
+                selector_stats["misses"] = selector_stats.get("misses", 0) + 1
+        self._save()
+
+    def stale_selectors(self) -> List[str]:
+        """
+        Describe selectors that have stopped matching.
+
+        Returns:
+            One warning per stale selector, plus one per group and kind where
+            no selector has matched for stale_after posts
+        """
+        warnings = []
+        for group, kinds in sorted(self.groups.items()):
+            for kind, stats in sorted(kinds.items()):
+                last_any_hit = 0
+                for selector, selector_stats in stats["selectors"].items():
+                    last_any_hit = max(last_any_hit, selector_stats["last_hit"])
+                    misses = selector_stats.get("misses", 0)
+                    if selector_stats["hits"] and misses >= self.stale_after:
+                        warnings.append(f"{group}: {kind} selector {selector} was tried on the last {misses} posts "
+                                        f"without matching (matched {selector_stats['hits']} before)")
+                if stats["posts"] - last_any_hit >= self.stale_after:
+                    warnings.append(f"{group}: no {kind} selector has matched in the last "
+                                    f"{stats['posts'] - last_any_hit} posts")
+        return warnings
+
+    def print_stale_report(self):
+        """Print a warning for every selector that has stopped matching."""
+        for warning in self.stale_selectors():
+            print(f"Warning: {warning}")
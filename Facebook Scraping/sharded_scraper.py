@@ -0,0 +1,163 @@
+"""
+Scrape posts with several browser processes at once.
+
+A single Chromium process renders on roughly one core, so the URL queue is
+split into shards and each shard is scraped by its own worker process with
+its own copy of the logged-in profile (Chromium refuses to share a profile
+between processes). Workers don't touch the post store: they send every
+result back over a queue and this process, the only writer, commits it to
+the store, schedules retries and writes the metrics.
+
+Usage: python "Facebook Scraping/sharded_scraper.py" [process count]
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import traceback
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright
+
+import individual_post_scraper as scraper
+from post_store import PostStore
+from retry_queue import RetryQueue
+from scrape_metrics import MetricsLog, print_stage_summary
+
+SHARD_PROCESSES = 4  # Worker processes, each running its own browser with PAGE_POOL_SIZE tabs
+SHARD_PROFILE_PREFIX = "./playwright_session_shard"  # Profile copies are made next to USER_DATA_DIR
+# Profile parts that are large, rebuilt by Chromium on demand, or lock the profile to one process
+PROFILE_IGNORE_PATTERNS = ["Singleton*", "*.lock", "Cache", "Code Cache", "GPUCache", "CacheStorage",
+                           "ScriptCache", "GrShaderCache", "ShaderCache", "Crashpad"]
+
+def copy_profile(shard_index: int) -> str:
+    """
+    Copy the logged-in profile for a worker process.
+
+    The copy is refreshed on every run so each worker starts with the
+    current session cookies.
+
+    Returns:
+        Path of the profile copy
+    """
+    profile_dir = f"{SHARD_PROFILE_PREFIX}{shard_index}"
+    shutil.rmtree(profile_dir, ignore_errors=True)
+    shutil.copytree(scraper.USER_DATA_DIR, profile_dir, ignore=shutil.ignore_patterns(*PROFILE_IGNORE_PATTERNS))
+    return profile_dir
+
+def split_into_shards(urls: List[str], shard_count: int) -> List[List[str]]:
+    """Deal URLs out round-robin so every shard gets a similar mix of posts."""
+    return [shard for shard in (urls[index::shard_count] for index in range(shard_count)) if shard]
+
+async def scrape_shard_async(shard_index: int, urls: List[str], profile_dir: str, results_queue):
+    scraper.USER_DATA_DIR = profile_dir
+    metrics_log = MetricsLog(None)
+
+    async def send_result(result: Dict):
+        record = next((r for r in reversed(metrics_log.records) if r["url"] == result["url"]), None)
+        results_queue.put(("result", shard_index, result, record))
+
+    async with async_playwright() as p:
+        context, blocker = await scraper.launch_scraping_context(p)
+        try:
+            await scraper.scrape_posts_with_context(context, urls, scraper.PAGE_POOL_SIZE, blocker,
+                                                    metrics_log=metrics_log, on_result=send_result)
+        finally:
+            await context.close()
+
+def scrape_shard(shard_index: int, urls: List[str], profile_dir: str, results_queue):
+    """Worker process entry point: scrape one shard and send back every result."""
+    try:
+        asyncio.run(scrape_shard_async(shard_index, urls, profile_dir, results_queue))
+        results_queue.put(("done", shard_index, None, None))
+    except Exception:
+        results_queue.put(("failed", shard_index, traceback.format_exc(), None))
+
+def scrape_sharded(post_urls: List[str], process_count: int = SHARD_PROCESSES,
+                   metrics_log: Optional[MetricsLog] = None) -> List[Dict]:
+    """
+    Scrape posts with one browser process per shard.
+
+    Args:
+        post_urls: List of Facebook post URLs to scrape
+        process_count: Number of worker processes
+        metrics_log: Log to write each post's stage timings and counters to
+
+    Returns:
+        List of dictionaries containing post data and comments
+    """
+    store = PostStore(scraper.posts_log_path, scraper.file_path)
+    retry_queue = RetryQueue(scraper.retry_queue_path, scraper.RETRY_BASE_DELAY_SECONDS,
+                             scraper.RETRY_MAX_DELAY_SECONDS, scraper.RETRY_MAX_ATTEMPTS)
+    retry_queue.seed_from(store.posts())
+
+    urls_to_scrape = scraper.select_urls_to_scrape(post_urls, store)
+    urls_to_scrape += [url for url in retry_queue.due() if url not in urls_to_scrape]
+    if not urls_to_scrape:
+        print("All posts have already been scraped!")
+        return []
+
+    shards = split_into_shards(urls_to_scrape, process_count)
+    print(f"Will scrape {len(urls_to_scrape)} posts with {len(shards)} processes "
+          f"of {scraper.PAGE_POOL_SIZE} tab(s) each")
+
+    # Spawned processes start clean instead of inheriting this process's state
+    mp_context = multiprocessing.get_context("spawn")
+    results_queue = mp_context.Queue()
+    processes = []
+    for shard_index, shard in enumerate(shards):
+        process = mp_context.Process(target=scrape_shard,
+                                     args=(shard_index, shard, copy_profile(shard_index), results_queue))
+        process.start()
+        processes.append(process)
+
+    results = []
+    finished_shards = set()
+    while len(finished_shards) < len(processes):
+        try:
+            kind, shard_index, payload, record = results_queue.get(timeout=5)
+        except queue.Empty:
+            # A worker that was killed never reports back
+            if not any(process.is_alive() for process in processes):
+                break
+            continue
+
+        if kind == "result":
+            result = payload
+            results.append(result)
+            store.append(result)
+            if record and metrics_log is not None:
+                metrics_log.add(record)
+            if "error" not in result:
+                retry_queue.record_success(result["url"])
+            elif retry_queue.record_failure(result["url"], result["error"]):
+                print(f"[shard {shard_index}] Scheduled {result['url']} for retry")
+            else:
+                print(f"[shard {shard_index}] Giving up on {result['url']}")
+            print(f"[shard {shard_index}] Stored {result['url']} ({len(results)}/{len(urls_to_scrape)})")
+        else:
+            if kind == "failed":
+                print(f"[shard {shard_index}] Worker process failed:\n{payload}")
+            finished_shards.add(shard_index)
+
+    for process in processes:
+        process.join()
+
+    unfinished = len(urls_to_scrape) - len(results)
+    if unfinished:
+        print(f"{unfinished} posts were not scraped; they will be picked up by the next run")
+    return results
+
+if __name__ == "__main__":
+    if not os.path.exists(scraper.USER_DATA_DIR):
+        print("Please run your login script first to create a session.")
+    else:
+        process_count = int(sys.argv[1]) if len(sys.argv) > 1 else SHARD_PROCESSES
+        metrics_log = MetricsLog(scraper.metrics_path)
+        results = scrape_sharded(scraper.POST_URLS, process_count, metrics_log)
+        scraper.save_results_to_json(results)
+        if results:
+            scraper.print_summary(results)
+            print_stage_summary(metrics_log.records)
@@ -0,0 +1,80 @@
+import time
+from typing import Optional
+
+from json_files import load_json, save_json
+from post_urls import canonical_post_url, post_key_string
+
+FRONTIER_PATH = "Facebook Scraping/url_frontier.json"
+
+class UrlFrontier:
+    """
+    Persistent, deduplicated queue of discovered post URLs waiting to be scraped.
+
+    Posts are keyed by post id, so the same post found through
+    different links or in several crawls is queued once. A post stays in
+    the frontier until mark_done() is called after it has been stored; posts
+    taken but not finished when a run crashed are handed out again on the
+    next run. The frontier is saved after every change.
+    """
+
+    def __init__(self, path: str = FRONTIER_PATH):
+        """
+        Args:
+            path: JSON file the frontier is kept in
+        """
+        self.path = path
+        # Key by the current post_key_string, which older files may not use
+        entries = load_json(path, {}, "URL frontier")
+        self.entries = {post_key_string(entry["url"]): entry for entry in entries.values()}
+
+        for entry in self.entries.values():
+            entry["taken"] = False
+
+    def _save(self):
+        save_json(self.path, self.entries)
+
+    def __contains__(self, url: str) -> bool:
+        return post_key_string(url) in self.entries
+
+    def __len__(self) -> int:
+        """Count the posts waiting to be handed out."""
+        return sum(1 for entry in self.entries.values() if not entry["taken"])
+
+    def add(self, url: str, source: str = "", snippet: str = "") -> bool:
+        """
+        Queue a discovered post unless it is already queued.
+
+        Args:
+            url: Post URL in any form
+            source: Where the post was found, e.g. the group it was crawled from
+            snippet: Start of the post text, kept to review the keyword filter
+
+        Returns:
+            True if the post was new to the frontier
+        """
+        key = post_key_string(url)
+        if key in self.entries:
+            return False
+
+        self.entries[key] = {
+            "url": canonical_post_url(url),
+            "source": source,
+            "snippet": snippet,
+            "discovered_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "taken": False,
+        }
+        self._save()
+        return True
+
+    def pop(self) -> Optional[str]:
+        """Hand out the longest waiting post, or None if nothing is waiting."""
+        for entry in self.entries.values():
+            if not entry["taken"]:
+                entry["taken"] = True
+                return entry["url"]
+        return None
+
+    def mark_done(self, url: str):
+        """Remove a post from the frontier once its result has been stored."""
+        if self.entries.pop(post_key_string(url), None) is not None:
+            self._save()
@@ -0,0 +1,112 @@
+"""
+Benchmark the review page parsing backends on saved pages.
+
+Every installed backend parses the review cards of every page REPEATS
+times. Its reviews are checked against the original html.parser output,
+page by page, and the parse time per page is reported. Decoding the
+embedded page JSON (REVIEW_SOURCE = "embedded_json") is timed as well; its
+reviews carry full text, so instead of the dicts their review_signature()s
+are compared with the card reviews of the same page, since duplicate
+detection and incremental updates rely on both forms matching.
+By default the pages kept by the HTTP cache (http_cache.HTTP_CACHE_DIR)
+are used, so any earlier scrape leaves pages to benchmark.
+
+Usage: python "Trust Pilot Scraping/benchmark_parsing.py" [directory of .html pages] [repeats]
+"""
+import glob
+import os
+import sys
+import time
+
+import review_parsing
+from http_cache import HTTP_CACHE_DIR
+from review_parsing import (PARSER_BACKENDS, backend_available, extract_embedded_reviews, parse_review_page,
+                            review_signature)
+
+REPEATS = 5
+
+def load_pages(directory):
+    """
+    Read every .html file in a directory
+
+    Returns:
+        Dictionary of file name to page body
+    """
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html'))):
+        with open(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+def time_backend(pages, backend, repeats=REPEATS):
+    """
+    Parse every page repeats times with one backend
+
+    Returns:
+        Tuple of (seconds per page, reviews parsed from each page)
+    """
+    reviews_by_page = {}
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for name, html in pages.items():
+            reviews_by_page[name], _ = parse_review_page(html, set(), verbose=False, backend=backend)
+    seconds = time.perf_counter() - start
+    return seconds / (repeats * len(pages)), reviews_by_page
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else HTTP_CACHE_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else REPEATS
+
+    pages = load_pages(directory)
+    if not pages:
+        print(f"No .html pages found in {directory}, run the scraper first or pass a directory of saved pages.")
+        return
+
+    print(f"⏱️ Parsing {len(pages)} pages x {repeats} with each backend")
+    print("=" * 60)
+
+    # Time the review card parsing even on pages that embed their reviews
+    review_parsing.REVIEW_SOURCE = "selectors"
+
+    reference_seconds, reference = time_backend(pages, "html.parser", repeats)
+    review_count = sum(len(reviews) for reviews in reference.values())
+    print(f"{'backend':<12} {'ms/page':>9} {'speedup':>8} {'reviews':>8} {'mismatched pages':>17}")
+
+    for backend in PARSER_BACKENDS:
+        if not backend_available(backend):
+            print(f"{backend:<12} not installed")
+            continue
+
+        if backend == "html.parser":
+            seconds, reviews_by_page = reference_seconds, reference
+        else:
+            seconds, reviews_by_page = time_backend(pages, backend, repeats)
+
+        mismatches = [name for name in pages if reviews_by_page[name] != reference[name]]
+        print(f"{backend:<12} {seconds * 1000:>9.2f} {reference_seconds / seconds:>7.1f}x "
+              f"{sum(len(reviews) for reviews in reviews_by_page.values()):>8} {len(mismatches):>17}")
+        for name in mismatches[:5]:
+            print(f"   ⚠️ {name} differs from html.parser")
+
+    review_parsing.REVIEW_SOURCE = "embedded_json"
+    embedded_pages = sum(1 for html in pages.values() if extract_embedded_reviews(html) is not None)
+    if embedded_pages:
+        seconds, reviews_by_page = time_backend(pages, None, repeats)
+        print(f"{'json':<12} {seconds * 1000:>9.2f} {reference_seconds / seconds:>7.1f}x "
+              f"{sum(len(reviews) for reviews in reviews_by_page.values()):>8}   "
+              f"({embedded_pages}/{len(pages)} pages embed their reviews)")
+
+        # Pages without embedded data fell back to the cards, so they match trivially
+        mismatches = [name for name in pages
+                      if [review_signature(review) for review in reviews_by_page[name]]
+                      != [review_signature(review) for review in reference[name]]]
+        print(f"{'':<12} {len(mismatches)} pages whose embedded reviews don't match the cards' signatures")
+        for name in mismatches[:5]:
+            print(f"   ⚠️ {name} differs from html.parser")
+    else:
+        print(f"{'json':<12} no page embeds its reviews")
+
+    print(f"\n📊 {review_count} reviews on {len(pages)} pages with html.parser")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_CACHE_DIR = 'Trust Pilot Scraping/http_cache'  # Cached page bodies and their validators
+POOL_CONNECTIONS = 4  # Hosts to keep connection pools for
+POOL_MAXSIZE = 8  # Keep-alive connections per host, should cover the requests sent at the same time
+
+class CachedResponse:
+    """
+    The parts of a response the scraper uses.
+
+    A 304 from the server is turned into the cached 200 response, so callers
+    handle fresh and revalidated pages the same way; from_cache tells them
+    apart.
+    """
+
+    def __init__(self, url, status_code, content, from_cache=False, headers=None):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.from_cache = from_cache
+        self.headers = headers if headers is not None else {}
+
+class CachedSession:
+    """
+    Pooled HTTP session with an on-disk conditional-GET cache.
+
+    One requests.Session is shared by every request so connections to
+    trustpilot.com are kept alive instead of being opened per page. Pages
+    served with an ETag or Last-Modified header are stored under cache_dir;
+    the next request for them is sent with If-None-Match/If-Modified-Since
+    and a 304 answer is served from disk. Safe to use from several threads.
+    """
+
+    def __init__(self, headers=None, cache_dir=HTTP_CACHE_DIR, pool_maxsize=POOL_MAXSIZE):
+        """
+        Args:
+            headers: Headers sent with every request
+            cache_dir: Directory for the cache, None to disable caching
+            pool_maxsize: Keep-alive connections per host
+        """
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+        self.cache_dir = cache_dir
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "not_modified": 0, "bytes_downloaded": 0}
+
+    def _cache_paths(self, url):
+        name = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json"), os.path.join(self.cache_dir, f"{name}.html")
+
+    def _load(self, url):
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(body_path, 'rb') as f:
+                body = f.read()
+        except (OSError, json.JSONDecodeError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        meta = {
+            "url": url,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "stored_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        meta_path, body_path = self._cache_paths(url)
+        suffix = f"{threading.get_ident()}.tmp"
+
+        # Body first, so a metadata file always points at a complete body
+        with open(f"{body_path}.{suffix}", 'wb') as f:
+            f.write(response.content)
+        os.replace(f"{body_path}.{suffix}", body_path)
+
+        with open(f"{meta_path}.{suffix}", 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(f"{meta_path}.{suffix}", meta_path)
+
+    def get(self, url, timeout=None):
+        """
+        GET a page, revalidating the cached copy if there is one
+
+        Returns:
+            CachedResponse with the page body
+        """
+        meta, body = self._load(url) if self.cache_dir else (None, None)
+        conditional_headers = {}
+        if meta:
+            if meta.get("etag"):
+                conditional_headers['If-None-Match'] = meta["etag"]
+            if meta.get("last_modified"):
+                conditional_headers['If-Modified-Since'] = meta["last_modified"]
+
+        response = self.session.get(url, headers=conditional_headers, timeout=timeout)
+
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["bytes_downloaded"] += len(response.content)
+            if response.status_code == 304 and body is not None:
+                self.stats["not_modified"] += 1
+
+        if response.status_code == 304 and body is not None:
+            return CachedResponse(url, 200, body, from_cache=True)
+
+        if self.cache_dir and response.status_code == 200 and (
+                response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self._store(url, response)
+
+        return CachedResponse(url, response.status_code, response.content, headers=response.headers)
+
+    def summary(self):
+        """
+        One-line summary of requests, revalidations and bytes downloaded
+        """
+        return (f"{self.stats['not_modified']}/{self.stats['requests']} pages unchanged (304), "
+                f"{self.stats['bytes_downloaded'] / 1024:.0f} KiB downloaded")
+
+    def close(self):
+        self.session.close()
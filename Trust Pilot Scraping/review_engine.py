@@ -0,0 +1,576 @@
+import asyncio
+import multiprocessing
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+
+import review_parsing
+from http_cache import HTTP_CACHE_DIR, CachedSession
+from review_parsing import parse_review_page, print_field_hit_report, take_until_known
+
+TRUSTPILOT_BASE_URL = "https://www.trustpilot.com/review/"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+# Request budget for trustpilot.com, shared by every company being scraped
+REQUESTS_PER_SECOND = 2.0
+BURST = 4  # Requests that may go out back to back after an idle period
+PAGES_IN_FLIGHT = 2  # Pages of one company fetched or parsed ahead of the page being merged
+MAX_IN_FLIGHT = 8  # Requests running at the same time overall
+REQUEST_TIMEOUT_SECONDS = 30
+
+# Throttled (429), failing (5xx) and network-errored requests are retried with capped, jittered backoff
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+RETRY_BASE_DELAY_SECONDS = 2
+RETRY_MAX_DELAY_SECONDS = 60  # Also caps how long a Retry-After header is honoured
+
+# AIMD: good responses raise the in-flight limit by about one per round trip
+# and the request rate by about AIMD_RATE_STEP per second; a throttled one halves both
+AIMD_DECREASE_FACTOR = 0.5
+AIMD_RATE_STEP = 0.5  # Requests per second regained per second of good responses, up to the configured rate
+AIMD_MIN_RATE = 0.2
+AIMD_COOLDOWN_SECONDS = 2  # Throttled responses within this time of a decrease count as one
+
+# Parsing runs in separate processes fed from a bounded queue of fetched pages
+PARSE_PROCESSES = min(4, os.cpu_count() or 1)
+PARSE_QUEUE_SIZE = 16  # Fetched pages waiting for a parser; fetching pauses while it is full
+
+def page_url(company_name, page, newest_first=False):
+    """
+    Build the review page URL for a company
+    """
+    base_url = f"{TRUSTPILOT_BASE_URL}{company_name}"
+    params = (["sort=recency"] if newest_first else []) + ([f"page={page}"] if page > 1 else [])
+    return f"{base_url}?{'&'.join(params)}" if params else base_url
+
+def retry_after_seconds(headers):
+    """
+    Read a Retry-After header given in seconds or as an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or unreadable
+    """
+    value = headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def retry_delay(attempt, retry_after=None):
+    """
+    Seconds to wait before retry number attempt (0-based)
+
+    Exponential backoff capped at RETRY_MAX_DELAY_SECONDS with jitter, so
+    requests that failed together don't come back together. A Retry-After
+    from the server takes precedence when it asks for longer.
+    """
+    backoff = min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt)
+    delay = backoff / 2 + random.uniform(0, backoff / 2)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, RETRY_MAX_DELAY_SECONDS) + random.uniform(0, RETRY_BASE_DELAY_SECONDS))
+    return delay
+
+def get_with_retries(session, url, max_retries=MAX_RETRIES):
+    """
+    Blocking GET with the same retry rules as ReviewFetcher.fetch, for the sequential scraper
+
+    Returns:
+        The last response; raises the last requests.RequestException if every attempt failed
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+        except requests.RequestException as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_delay(attempt)
+            print(f"⚠️ {e}, retrying in {delay:.1f}s...")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                return response
+            delay = retry_delay(attempt, retry_after_seconds(response.headers))
+            print(f"⚠️ Status {response.status_code}, retrying in {delay:.1f}s...")
+        time.sleep(delay)
+
+class TokenBucket:
+    """
+    Token bucket rate limiter for asyncio.
+
+    Tokens refill at `rate` per second up to `capacity`; every request takes
+    one. Waiters are served in arrival order, so the budget is shared fairly
+    between companies instead of each one sleeping on its own. The rate may
+    be changed while running, and pause() holds every request back, e.g.
+    for a Retry-After. wait() is the blocking form of acquire() for
+    synchronous callers.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = None
+
+    def pause(self, seconds):
+        """
+        Send nothing for the next seconds, then restart without a burst
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+    def _take(self):
+        """
+        Take a token if there is one, otherwise return the seconds until there may be
+        """
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent
+        """
+        if self.lock is None:
+            self.lock = asyncio.Lock()
+
+        async with self.lock:
+            while True:
+                delay = self._take()
+                if not delay:
+                    return
+                await asyncio.sleep(delay)
+
+    def wait(self):
+        """
+        Block until a request may be sent
+        """
+        while True:
+            delay = self._take()
+            if not delay:
+                return
+            time.sleep(delay)
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the requests in flight and the request rate.
+
+    Good responses grow the in-flight limit additively (about one more per
+    round trip) and the bucket's rate by about AIMD_RATE_STEP per second,
+    back up to the configured values; a throttled response (429, 5xx, network error)
+    multiplies both by AIMD_DECREASE_FACTOR, at most once per
+    AIMD_COOLDOWN_SECONDS. The crawl settles just under the rate at which
+    trustpilot.com starts throttling.
+    """
+
+    def __init__(self, bucket, max_in_flight):
+        self.bucket = bucket
+        self.max_rate = bucket.rate
+        self.max_limit = max_in_flight
+        self.limit = float(max_in_flight)
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.decreases = 0
+        self.condition = None
+
+    async def acquire(self):
+        """
+        Wait until another request may be in flight
+        """
+        if self.condition is None:
+            self.condition = asyncio.Condition()
+
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, throttled):
+        """
+        Finish a request and adjust the limits with its outcome (None leaves them as they are)
+        """
+        now = time.monotonic()
+        if throttled and now - self.last_decrease >= AIMD_COOLDOWN_SECONDS:
+            self.limit = max(1.0, self.limit * AIMD_DECREASE_FACTOR)
+            self.bucket.rate = max(AIMD_MIN_RATE, self.bucket.rate * AIMD_DECREASE_FACTOR)
+            self.last_decrease = now
+            self.decreases += 1
+        elif throttled is False:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.bucket.rate = min(self.max_rate, self.bucket.rate + AIMD_RATE_STEP / self.bucket.rate)
+
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+class ReviewFetcher:
+    """
+    Fetches Trustpilot pages concurrently under the shared rate limit.
+
+    requests is blocking, so requests run on a thread pool while the event
+    loop decides what goes out next. All requests share one pooled, cached
+    session (see http_cache.CachedSession). Throttled and failed requests
+    are retried (see retry_delay); a Retry-After pauses every request, not
+    just the one that got it.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, burst=BURST, max_in_flight=MAX_IN_FLIGHT, cache_dir=HTTP_CACHE_DIR):
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = AdaptiveConcurrency(self.bucket, max_in_flight)
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self.session = CachedSession(HEADERS, cache_dir, pool_maxsize=max_in_flight)
+        self.requests_sent = 0
+        self.retries = 0
+        self.throttled = Counter()  # Status code (or "error") -> throttled responses
+
+    async def fetch(self, url):
+        """
+        Fetch a page once the rate limit allows it, retrying throttled and failed requests
+
+        Returns:
+            Tuple of (status code, response body); a status in RETRY_STATUSES
+            means every retry failed. Raises the last requests.RequestException
+            if every attempt failed with one.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(MAX_RETRIES + 1):
+            await self.concurrency.acquire()
+            try:
+                await self.bucket.acquire()
+                self.requests_sent += 1
+                response = await loop.run_in_executor(
+                    self.executor, lambda: self.session.get(url, timeout=REQUEST_TIMEOUT_SECONDS)
+                )
+            except requests.RequestException as e:
+                await self.concurrency.release(throttled=True)
+                self.throttled["error"] += 1
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = retry_delay(attempt)
+                print(f"⚠️ {url}: {e}, retrying in {delay:.1f}s")
+            except BaseException:
+                # Cancelled: the request says nothing about the site's limits
+                await self.concurrency.release(throttled=None)
+                raise
+            else:
+                throttled = response.status_code in RETRY_STATUSES
+                await self.concurrency.release(throttled)
+                if not throttled:
+                    return response.status_code, response.content
+                self.throttled[response.status_code] += 1
+                if attempt == MAX_RETRIES:
+                    return response.status_code, response.content
+
+                retry_after = retry_after_seconds(response.headers)
+                delay = retry_delay(attempt, retry_after)
+                if retry_after is not None:
+                    self.bucket.pause(delay)
+                print(f"⚠️ {url}: status {response.status_code}, retrying in {delay:.1f}s")
+
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def summary(self):
+        """
+        One-line summary of retries and where AIMD left the limits
+        """
+        throttled = ", ".join(f"{count}x {status}" for status, count in self.throttled.items()) or "none"
+        return (f"{self.retries} retries (throttled: {throttled}), {self.concurrency.decreases} backoffs, "
+                f"ended at {int(self.concurrency.limit)} in flight / {self.bucket.rate:.2f} requests/s")
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+def parse_page_worker(content, review_source, parser_backend):
+    """
+    Parse one review page in a parser process
+
+    The page is parsed with an empty duplicate set; its signatures are sent
+    back so the company's pages can be deduplicated when they are merged.
+
+    Returns:
+        Tuple of (reviews, review count, signatures on the page, field hits)
+    """
+    review_parsing.REVIEW_SOURCE = review_source
+    page_signatures = set()
+    field_hits = Counter()
+    reviews, review_count = parse_review_page(content, page_signatures, False, parser_backend, field_hits)
+    return reviews, review_count, page_signatures, field_hits
+
+class CompanyCrawl:
+    """
+    Pages of one company moving through the pipeline.
+
+    Pages are fetched and parsed in any order but merged strictly in page
+    order, with the same rules as scrape_trustpilot_reviews: a page that
+    doesn't return 200 is skipped, the first page without new reviews ends
+    the company, and an error stops it. Results of pages past that point
+    are dropped.
+
+    With known_keys (ids and signatures of the reviews already saved) the
+    company is updated incrementally: pages are requested newest first and
+    the crawl stops at the first review that is already known.
+    """
+
+    def __init__(self, company_name, max_pages, pages_in_flight, known_keys=None, on_page_reviews=None,
+                 field_hits=None):
+        """
+        Args:
+            on_page_reviews: Called with (company, page, new reviews) as pages are merged
+            field_hits: Counter to add the field hits of every merged page to
+        """
+        self.company_name = company_name
+        self.max_pages = max_pages
+        self.known_keys = known_keys
+        self.on_page_reviews = on_page_reviews
+        self.field_hits = field_hits
+        self.window = asyncio.Semaphore(pages_in_flight)  # Released as pages are merged
+        self.pages_in_flight = pages_in_flight
+        self.outcomes = {}  # Page number -> outcome waiting for the pages before it
+        self.next_page = 1
+        self.seen_reviews = set()  # Track duplicates across all pages
+        self.reviews = []
+        self.finished = asyncio.Event()
+
+    def deliver(self, page, outcome):
+        """
+        Record the outcome of a page and merge every page that is now next in line
+
+        Args:
+            page: Page number
+            outcome: ("error", exception), ("status", status code) or ("parsed", parse_page_worker result)
+        """
+        if self.finished.is_set():
+            return
+        self.outcomes[page] = outcome
+
+        while self.next_page in self.outcomes and not self.finished.is_set():
+            page = self.next_page
+            kind, value = self.outcomes.pop(page)
+            self.next_page += 1
+
+            if kind == "error":
+                print(f"❌ [{self.company_name}] Error scraping page {page}: {value}")
+                self.finish()
+                break
+
+            if kind == "status":
+                print(f"❌ [{self.company_name}] Failed to get page {page}: Status {value}")
+            else:
+                reviews, review_count, page_signatures, page_hits = value
+                new_reviews = [review for review in reviews
+                               if review_parsing.review_signature(review) not in self.seen_reviews]
+                self.seen_reviews |= page_signatures
+                reached_known = False
+                if self.known_keys is not None:
+                    new_reviews, reached_known = take_until_known(new_reviews, self.known_keys)
+                self.reviews.extend(new_reviews)
+                if self.field_hits is not None:
+                    self.field_hits.update(page_hits)
+                print(f"📄 [{self.company_name}] Page {page}: {review_count} reviews, "
+                      f"{len(new_reviews)} new reviews ({len(self.reviews)} total)")
+                if self.on_page_reviews and new_reviews:
+                    self.on_page_reviews(self.company_name, page, new_reviews)
+
+                if reached_known:
+                    print(f"🔚 [{self.company_name}] Reached reviews saved earlier on page {page}, stopping...")
+                    self.finish()
+                    break
+
+                # Break if no reviews found (reached end)
+                if not new_reviews:
+                    print(f"🔚 [{self.company_name}] No new reviews found on page {page}, stopping...")
+                    self.finish()
+                    break
+
+            self.window.release()
+
+        if self.next_page > self.max_pages:
+            self.finish()
+
+    def finish(self):
+        if not self.finished.is_set():
+            self.finished.set()
+            # Wake the page producer so it can see the company is done
+            for _ in range(self.pages_in_flight):
+                self.window.release()
+
+class ReviewPipeline:
+    """
+    Fetch/parse pipeline shared by every company of a run.
+
+    Fetch tasks (rate limited, on the fetcher's thread pool) push raw pages
+    into a bounded queue; parser tasks hand them to a process pool and
+    deliver the results to their company for ordered merging. A full queue
+    holds back fetching, and each company has at most pages_in_flight
+    pages between being requested and being merged.
+    """
+
+    def __init__(self, fetcher, parse_processes=PARSE_PROCESSES, queue_size=PARSE_QUEUE_SIZE, on_page_reviews=None):
+        self.fetcher = fetcher
+        self.parse_processes = parse_processes
+        # Spawned parser processes start clean instead of inheriting the fetch threads
+        self.process_pool = ProcessPoolExecutor(max_workers=parse_processes,
+                                                mp_context=multiprocessing.get_context("spawn"))
+        self.parse_queue = asyncio.Queue(maxsize=queue_size)
+        self.on_page_reviews = on_page_reviews
+        self.field_hits = Counter()
+        self.pages_parsed = 0
+
+    async def fetch_page(self, crawl, page):
+        try:
+            status, content = await self.fetcher.fetch(
+                page_url(crawl.company_name, page, newest_first=crawl.known_keys is not None)
+            )
+        except Exception as e:
+            crawl.deliver(page, ("error", e))
+            return
+
+        if status != 200:
+            crawl.deliver(page, ("status", status))
+        elif not crawl.finished.is_set():
+            await self.parse_queue.put((crawl, page, content))
+
+    async def parse_pages(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            crawl, page, content = await self.parse_queue.get()
+            try:
+                if crawl.finished.is_set():
+                    continue
+                try:
+                    result = await loop.run_in_executor(self.process_pool, parse_page_worker, content,
+                                                        review_parsing.REVIEW_SOURCE, review_parsing.PARSER_BACKEND)
+                except Exception as e:
+                    crawl.deliver(page, ("error", e))
+                    continue
+                self.pages_parsed += 1
+                crawl.deliver(page, ("parsed", result))
+            finally:
+                self.parse_queue.task_done()
+
+    async def scrape_company(self, company_name, max_pages=5, pages_in_flight=PAGES_IN_FLIGHT, known_keys=None):
+        """
+        Scrape the reviews of one company through the pipeline
+
+        Args:
+            known_keys: Ids and signatures of the company's saved reviews, to only fetch newer ones
+
+        Returns:
+            List of the company's reviews in page order
+        """
+        crawl = CompanyCrawl(company_name, max_pages, pages_in_flight, known_keys, self.on_page_reviews,
+                             self.field_hits)
+        fetch_tasks = []
+        for page in range(1, max_pages + 1):
+            await crawl.window.acquire()
+            if crawl.finished.is_set():
+                break
+            fetch_tasks.append(asyncio.create_task(self.fetch_page(crawl, page)))
+
+        await crawl.finished.wait()
+        for task in fetch_tasks:
+            task.cancel()
+        return crawl.reviews
+
+    async def run(self, companies, max_pages=5, pages_in_flight=PAGES_IN_FLIGHT, on_company_done=None,
+                  known_reviews=None):
+        """
+        Scrape several companies, calling on_company_done(company, reviews) as each one finishes
+
+        Companies in known_reviews (company to known review keys) are updated
+        incrementally instead of scraped in full.
+
+        Returns:
+            List of review counts in the order of companies
+        """
+        parsers = [asyncio.create_task(self.parse_pages()) for _ in range(self.parse_processes)]
+
+        async def scrape(company):
+            known_keys = (known_reviews or {}).get(company)
+            reviews = await self.scrape_company(company, max_pages, pages_in_flight, known_keys)
+            if on_company_done:
+                on_company_done(company, reviews)
+            return len(reviews)
+
+        try:
+            return await asyncio.gather(*(scrape(company) for company in companies))
+        finally:
+            for parser in parsers:
+                parser.cancel()
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+
+async def scrape_companies_async(companies, max_pages=5, on_company_done=None, rate=REQUESTS_PER_SECOND,
+                                 burst=BURST, pages_in_flight=PAGES_IN_FLIGHT, max_in_flight=MAX_IN_FLIGHT,
+                                 cache_dir=HTTP_CACHE_DIR, parse_processes=PARSE_PROCESSES,
+                                 queue_size=PARSE_QUEUE_SIZE, on_page_reviews=None, known_reviews=None):
+    """
+    Scrape several companies at once under one request-rate budget.
+
+    Args:
+        companies: Trustpilot company domains to scrape
+        max_pages: Maximum review pages per company
+        on_company_done: Called with (company, reviews) as soon as a company is finished
+        rate: Requests per second allowed for trustpilot.com
+        burst: Requests that may go out back to back
+        pages_in_flight: Pages of one company fetched or parsed ahead of the page being merged
+        max_in_flight: Requests running at the same time overall
+        cache_dir: Directory of the conditional-GET page cache, None to disable it
+        parse_processes: Processes parsing pages
+        queue_size: Fetched pages that may wait for a parser
+        on_page_reviews: Called with (company, page, new reviews) as each page is merged
+        known_reviews: Company to the ids and signatures of its saved reviews (see
+            review_parsing.known_review_keys); these companies only get their newer reviews
+
+    Returns:
+        Dictionary of company to number of reviews scraped
+    """
+    fetcher = ReviewFetcher(rate, burst, max_in_flight, cache_dir)
+    pipeline = ReviewPipeline(fetcher, parse_processes, queue_size, on_page_reviews)
+
+    start = time.monotonic()
+    try:
+        counts = await pipeline.run(companies, max_pages, pages_in_flight, on_company_done, known_reviews)
+    finally:
+        fetcher.close()
+
+    elapsed = time.monotonic() - start
+    print(f"⏱️ {fetcher.requests_sent} requests, {pipeline.pages_parsed} pages parsed in {elapsed:.1f}s "
+          f"({fetcher.requests_sent / max(elapsed, 1e-9):.2f} requests/s)")
+    print(f"🗄️ {fetcher.session.summary()}")
+    print(f"🚦 {fetcher.summary()}")
+    print_field_hit_report(pipeline.field_hits)
+    return dict(zip(companies, counts))
+
+def scrape_companies(companies, max_pages=5, on_company_done=None, **limits):
+    """
+    Synchronous wrapper around scrape_companies_async
+    """
+    return asyncio.run(scrape_companies_async(companies, max_pages, on_company_done, **limits))
@@ -0,0 +1,420 @@
+import json
+import re
+from datetime import datetime
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+try:
+    import lxml  # noqa: F401  (only needed as a BeautifulSoup tree builder)
+except ImportError:
+    lxml = None
+
+# Parsing backends, fastest first. "auto" uses the first one installed;
+# "html.parser" is the original full BeautifulSoup parse and always works.
+PARSER_BACKENDS = ["selectolax", "lxml", "html.parser"]
+PARSER_BACKEND = "auto"
+
+# "embedded_json" decodes the review data Trustpilot embeds in the page (selectors as fallback),
+# "selectors" always reads the rendered review cards
+REVIEW_SOURCE = "embedded_json"
+
+# Next.js page data; found with a regex so pages that have it are never parsed into a tree
+NEXT_DATA_PATTERN = re.compile(rb'<script[^>]*\bid="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
+# The lxml backend only builds a tree for the review cards, not the whole page
+REVIEW_CARD_STRAINER = SoupStrainer(attrs={'data-service-review-card-paper': True})
+
+# Tried in order until one finds review containers
+CONTAINER_SELECTORS = [
+    'article[data-service-review-card-paper]',
+    'div[data-service-review-card-paper]',
+    '[data-service-review-card-paper]'
+]
+
+REVIEWER_SELECTORS = [
+    'span[data-consumer-name-typography="true"]',
+    '.typography_heading-xxs__QKBS8.typography_appearance-default__AAY17',
+    'span.typography_heading-xxs__QKBS8',
+    '[data-consumer-name-typography] span',
+    'span[class*="consumer-name"]'
+]
+
+RATING_SELECTORS = [
+    '[data-service-review-rating]',
+    'img[alt*="star"]',
+    '[class*="star-rating"]'
+]
+
+TITLE_SELECTORS = [
+    'h2[data-service-review-title-typography="true"]',
+    '[data-service-review-title-typography]',
+    'h2',
+    'h3'
+]
+
+TEXT_SELECTORS = [
+    'p[data-service-review-text-typography="true"]',
+    '[data-service-review-text-typography]',
+    '.styles_reviewContent__0Q2Tg',
+    'p[class*="review-text"]',
+    'div[class*="review-content"] p'
+]
+
+DATE_SELECTORS = [
+    'time[datetime]',
+    '[datetime]',
+    '.styles_reviewHeader__iU9Px time',
+    'time'
+]
+
+class LexborNode:
+    """
+    A selectolax node behind the part of the BeautifulSoup Tag interface
+    that the extraction code uses, so both backends share it.
+    """
+
+    def __init__(self, node):
+        self.node = node
+        self.name = node.tag
+        self.attrs = node.attributes
+
+    def select(self, selector):
+        return [LexborNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector):
+        node = self.node.css_first(selector)
+        return LexborNode(node) if node is not None else None
+
+    def get_text(self, strip=False):
+        return self.node.text(deep=True, separator='', strip=strip)
+
+    def has_attr(self, name):
+        return name in self.attrs
+
+    def __getitem__(self, name):
+        # selectolax gives None for attributes without a value, BeautifulSoup ''
+        return self.attrs[name] or ''
+
+def backend_available(backend):
+    """
+    Check whether a parsing backend's library is installed
+    """
+    if backend == "selectolax":
+        return LexborHTMLParser is not None
+    if backend == "lxml":
+        return lxml is not None
+    return backend == "html.parser"
+
+def resolve_backend(backend=None):
+    """
+    Turn a backend setting ("auto" or a name from PARSER_BACKENDS) into an installed backend
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "auto":
+        return next(name for name in PARSER_BACKENDS if backend_available(name))
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend {backend!r}, expected one of {PARSER_BACKENDS}")
+    if not backend_available(backend):
+        raise ValueError(f"Parser backend {backend!r} is not installed")
+    return backend
+
+def parse_document(html, backend=None):
+    """
+    Parse a review page with the chosen backend
+
+    Returns:
+        Root node that find_review_containers and parse_review_container accept
+    """
+    backend = resolve_backend(backend)
+    if backend == "selectolax":
+        return LexborNode(LexborHTMLParser(html).root)
+    if backend == "lxml":
+        return BeautifulSoup(html, 'lxml', parse_only=REVIEW_CARD_STRAINER)
+    return BeautifulSoup(html, 'html.parser')
+
+def find_review_containers(soup):
+    """
+    Find all review containers - these contain all review data together
+    """
+    for selector in CONTAINER_SELECTORS:
+        review_containers = soup.select(selector)
+        if review_containers:
+            return review_containers
+    return []
+
+def read_reviewer(elem):
+    return True, elem.get_text(strip=True)
+
+def read_rating(elem):
+    rating = None
+    if elem.has_attr('data-service-review-rating'):
+        rating = int(elem['data-service-review-rating'])
+    elif elem.name == 'img' and 'alt' in elem.attrs:
+        rating_match = re.search(r'(\d)', elem['alt'])
+        if rating_match:
+            rating = int(rating_match.group(1))
+    return True, rating
+
+def read_title(elem):
+    title = elem.get_text(strip=True)
+    if len(title) > 5:  # Only use meaningful titles
+        return True, title
+    return False, ""
+
+def read_text(elem):
+    text = elem.get_text(strip=True)
+    if len(text) <= 10:  # Only use meaningful text
+        return False, text
+    # Clean up "See more" endings
+    if text.endswith('See more'):
+        text = text[:-8].strip()
+    elif text.endswith('...See more'):
+        text = text[:-11].strip()
+    return True, text
+
+def read_date(elem):
+    if elem.has_attr('datetime'):
+        # Parse ISO datetime and format it
+        return True, format_review_date(elem['datetime'])
+    return True, elem.get_text(strip=True)
+
+# For each review field: selector cascade, reader deciding whether a match is usable, and value when nothing is
+REVIEW_FIELDS = {
+    "reviewer": (REVIEWER_SELECTORS, read_reviewer, "Anonymous"),
+    "rating": (RATING_SELECTORS, read_rating, None),
+    "title": (TITLE_SELECTORS, read_title, ""),
+    "text": (TEXT_SELECTORS, read_text, ""),
+    "date": (DATE_SELECTORS, read_date, "")
+}
+
+def print_field(field, value):
+    if field == "reviewer":
+        print(f"👤 Reviewer: {value}")
+    elif field == "rating":
+        print(f"⭐ Rating: {value}")
+    elif field == "title":
+        print(f"📝 Title: {value}")
+    elif field == "text":
+        print(f"💬 Text ({len(value)} chars): {value[:100]}...")
+    else:
+        print(f"📅 Date: {value}")
+
+def match_field(container, field):
+    """
+    Run a field's full selector cascade on one review card
+
+    Returns:
+        Tuple of (winning selector or None, field value)
+    """
+    selectors, reader, value = REVIEW_FIELDS[field]
+    for selector in selectors:
+        elem = container.select_one(selector)
+        if elem:
+            accepted, value = reader(elem)
+            if accepted:
+                return selector, value
+    return None, value
+
+def parse_review_container(container, verbose=True, plan=None, field_hits=None):
+    """
+    Extract reviewer, rating, title, text and date from one review container
+
+    Args:
+        container: Review card node
+        verbose: Print every extracted field
+        plan: Selector plan of the page, field to the selector that won on an
+            earlier card; tried first and filled in as fields are matched
+        field_hits: Counter of (field, "plan" / "cascade" / "miss") to add to
+    """
+    plan = {} if plan is None else plan
+    review_data = {}
+
+    for field, (selectors, reader, _) in REVIEW_FIELDS.items():
+        source = "plan"
+        accepted = False
+        if field in plan:
+            elem = container.select_one(plan[field])
+            if elem:
+                accepted, value = reader(elem)
+
+        if not accepted:
+            # The card doesn't match the plan: fall back to the full cascade
+            selector, value = match_field(container, field)
+            accepted = selector is not None
+            source = "cascade" if accepted else "miss"
+            if accepted:
+                plan.setdefault(field, selector)
+
+        if accepted and verbose:
+            print_field(field, value)
+        if field_hits is not None:
+            field_hits[(field, source)] += 1
+        review_data[field] = value
+
+    return review_data
+
+def print_field_hit_report(field_hits):
+    """
+    Print how often each review field was read through the page's selector plan
+    """
+    if not field_hits:
+        return
+
+    print("\n🎯 Review card fields by source (plan / cascade fallback / no match):")
+    for field in REVIEW_FIELDS:
+        plan_hits = field_hits[(field, "plan")]
+        cascade_hits = field_hits[(field, "cascade")]
+        misses = field_hits[(field, "miss")]
+        total = plan_hits + cascade_hits + misses
+        if total:
+            print(f"   {field:<9} {plan_hits:>6} / {cascade_hits:>6} / {misses:>6}  "
+                  f"({plan_hits / total:.0%} from plan)")
+
+def format_review_date(timestamp):
+    """
+    Format an ISO timestamp as YYYY-MM-DD, like the dates read from review cards
+    """
+    try:
+        return datetime.fromisoformat(timestamp.replace('Z', '+00:00')).strftime('%Y-%m-%d')
+    except ValueError:
+        return timestamp
+
+def extract_embedded_reviews(html):
+    """
+    Decode the reviews from the page's __NEXT_DATA__ JSON
+
+    Returns:
+        List of review dicts with the card fields plus id and published_at,
+        or None if the page has no usable embedded review data
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+
+    match = NEXT_DATA_PATTERN.search(html)
+    if not match:
+        return None
+
+    try:
+        page_data = json.loads(match.group(1))
+        embedded_reviews = page_data["props"]["pageProps"]["reviews"]
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(embedded_reviews, list):
+        return None
+
+    reviews = []
+    for embedded in embedded_reviews:
+        consumer = embedded.get("consumer") or {}
+        published_at = (embedded.get("dates") or {}).get("publishedDate") or ""
+        reviews.append({
+            "reviewer": (consumer.get("displayName") or "Anonymous").strip(),
+            "rating": embedded.get("rating"),
+            "title": (embedded.get("title") or "").strip(),
+            "text": (embedded.get("text") or "").strip(),
+            "date": format_review_date(published_at) if published_at else "",
+            "id": embedded.get("id"),
+            "published_at": published_at
+        })
+    return reviews
+
+def review_signature(review):
+    """
+    Create unique identifier to avoid duplicates
+
+    Whitespace is left out of the reviewer and text: review cards lose the
+    line breaks that the embedded page JSON keeps (get_text joins a <br>
+    with nothing), and both forms of a review must give the same signature.
+    """
+    reviewer = "".join(review['reviewer'].split())
+    text = "".join(review['text'].split())
+    return f"{reviewer}_{review['rating']}_{review['date']}_{text[:50]}"
+
+def known_review_keys(reviews):
+    """
+    Collect the review ids and signatures of reviews already saved
+    """
+    keys = set()
+    for review in reviews:
+        if review.get("id"):
+            keys.add(review["id"])
+        keys.add(review_signature(review))
+    return keys
+
+def take_until_known(reviews, known_keys):
+    """
+    Keep the reviews in front of the first one that is already saved
+
+    Returns:
+        Tuple of (reviews before the first known one, whether a known review was reached)
+    """
+    for i, review in enumerate(reviews):
+        if review.get("id") in known_keys or review_signature(review) in known_keys:
+            return reviews[:i], True
+    return reviews, False
+
+def parse_review_page(html, seen_reviews, verbose=True, backend=None, field_hits=None):
+    """
+    Parse the reviews on one Trustpilot review page.
+
+    Reviews already in seen_reviews and reviews with neither title nor text
+    are skipped; the signatures of new reviews are added to seen_reviews.
+    With REVIEW_SOURCE = "embedded_json" the reviews come from the page's
+    __NEXT_DATA__ JSON (full text, review id and ISO publish time); the
+    review cards are only parsed when that data is missing, with a selector
+    plan worked out from the first card and reused for the rest of the page.
+    Every backend produces the same review dicts (see benchmark_parsing.py).
+
+    Args:
+        html: Page body, bytes or str
+        seen_reviews: Signatures of the reviews already scraped for this company
+        verbose: Print every extracted field
+        backend: Parsing backend for the review cards, defaults to PARSER_BACKEND
+        field_hits: Counter of (field, "plan" / "cascade" / "miss") to add the card fields to
+
+    Returns:
+        Tuple of (new reviews, number of reviews on the page)
+    """
+    embedded_reviews = extract_embedded_reviews(html) if REVIEW_SOURCE == "embedded_json" else None
+    if embedded_reviews is None:
+        if REVIEW_SOURCE == "embedded_json" and verbose:
+            print("⚠️ No embedded review data on this page, reading the review cards instead")
+        page_entries = find_review_containers(parse_document(html, backend))
+    else:
+        page_entries = embedded_reviews
+
+    plan = {}
+    reviews = []
+    for i, entry in enumerate(page_entries):
+        if verbose:
+            print(f"\n--- Processing Review {i + 1} ---")
+
+        if embedded_reviews is None:
+            review_data = parse_review_container(entry, verbose, plan, field_hits)
+        else:
+            review_data = entry
+            if verbose:
+                print(f"📦 Review {review_data['id']} by {review_data['reviewer']}, "
+                      f"⭐ {review_data['rating']}, 📅 {review_data['published_at']}")
+
+        signature = review_signature(review_data)
+
+        if signature in seen_reviews:
+            if verbose:
+                print(f"⚠️ Duplicate review detected, skipping...")
+            continue
+
+        seen_reviews.add(signature)
+
+        if not review_data["title"].strip() and not review_data["text"].strip():
+            if verbose:
+                print(f"⚠️ Skipping review with empty title and text")
+            continue
+
+        reviews.append(review_data)
+
+    return reviews, len(page_entries)
@@ -0,0 +1,193 @@
+"""
+Per-company review storage for the Trustpilot scraper.
+
+Usage: python "Trust Pilot Scraping/review_store.py" [output file]
+exports the store to the nested scraped_trust_pilot.json layout.
+"""
+import json
+import os
+import re
+import sys
+import time
+
+from json_files import load_json, save_json
+
+REVIEW_STORE_DIR = 'Trust Pilot Scraping/review_store'
+REVIEWS_JSON_PATH = 'Trust Pilot Scraping/scraped_trust_pilot.json'
+MANIFEST_NAME = 'manifest.json'
+
+class ReviewStore:
+    """
+    Append-only review store with one JSON Lines file per company.
+
+    A small manifest indexes the companies: each entry names the company's
+    file and records how many reviews and bytes of it are committed, so
+    looking a company up or adding reviews never reads the other companies.
+    Reviews are appended and fsynced before the manifest is updated; bytes
+    a crash left past the committed size are cut off on the next append.
+    The manifest also keeps the order of the appended batches ("segments")
+    so incremental updates, which hold newer reviews, export in front of
+    the older ones. export_json writes the nested scraped_trust_pilot.json
+    layout that review_counter.py and the notebook read.
+
+    A scrape that saves a company page by page brackets the pages with
+    begin() and finish(). A company whose scrape never finished is rolled
+    back to what it held before when the store is opened, so it is scraped
+    again the same way instead of looking like a finished company.
+    """
+
+    def __init__(self, directory=REVIEW_STORE_DIR, legacy_json_path=REVIEWS_JSON_PATH):
+        """
+        Args:
+            directory: Directory holding the manifest and the per-company files
+            legacy_json_path: scraped_trust_pilot.json to import when the store doesn't exist yet
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.companies = {}
+        os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.manifest_path):
+            self.companies = load_json(self.manifest_path, {}, "review store manifest")
+        elif legacy_json_path and os.path.exists(legacy_json_path):
+            self._import_json(legacy_json_path)
+
+        unfinished = [company_name for company_name, entry in self.companies.items() if not entry.get("complete", True)]
+        for company_name in unfinished:
+            self._roll_back(company_name)
+        if unfinished:
+            self._save_manifest()
+            print(f"↩️ Rolled back the unfinished scrapes of {', '.join(unfinished)}")
+
+    def _import_json(self, json_path):
+        data = load_json(json_path, None, "existing reviews")
+        if data is None:
+            return
+
+        review_count = 0
+        for company_data in data if isinstance(data, list) else []:
+            if isinstance(company_data, dict) and 'company' in company_data:
+                reviews = company_data.get('reviews', [])
+                self.append(company_data['company'], reviews)
+                review_count += len(reviews)
+        print(f"📥 Imported {review_count} reviews of {len(self.companies)} companies from {json_path} into {self.directory}")
+
+    def _save_manifest(self):
+        save_json(self.manifest_path, self.companies)
+
+    def _roll_back(self, company_name):
+        entry = self.companies[company_name]
+        checkpoint = entry["checkpoint"]
+        if checkpoint is None:
+            # The company was new, so there is nothing to keep
+            del self.companies[company_name]
+            return
+        # Batches are appended to the file, so everything the scrape saved lies past the checkpoint
+        entry["segments"] = [segment for segment in entry["segments"] if segment[0] < checkpoint["reviews"]]
+        entry["reviews"] = checkpoint["reviews"]
+        entry["bytes"] = checkpoint["bytes"]
+        entry["complete"] = True
+        del entry["checkpoint"]
+
+    def _entry(self, company_name):
+        if company_name not in self.companies:
+            file_name = re.sub(r'[^A-Za-z0-9._-]', '_', company_name) + '.jsonl'
+            self.companies[company_name] = {"file": file_name, "reviews": 0, "bytes": 0, "segments": []}
+        return self.companies[company_name]
+
+    def _company_path(self, company_name):
+        return os.path.join(self.directory, self.companies[company_name]["file"])
+
+    def __contains__(self, company_name):
+        return company_name in self.companies
+
+    def __len__(self):
+        return len(self.companies)
+
+    def review_count(self, company_name):
+        entry = self.companies.get(company_name)
+        return entry["reviews"] if entry else 0
+
+    def begin(self, company_name):
+        """
+        Mark a company as being scraped until finish() is called.
+
+        The reviews it holds now are what it is rolled back to if the scrape
+        never finishes; a company that wasn't stored yet is dropped.
+        """
+        entry = self.companies.get(company_name)
+        checkpoint = {"reviews": entry["reviews"], "bytes": entry["bytes"]} if entry else None
+        self._entry(company_name).update(complete=False, checkpoint=checkpoint)
+        self._save_manifest()
+
+    def finish(self, company_name):
+        """
+        Mark the scrape of a company as complete
+        """
+        entry = self.companies[company_name]
+        entry["complete"] = True
+        entry.pop("checkpoint", None)
+        self._save_manifest()
+
+    def append(self, company_name, reviews, position=None):
+        """
+        Commit reviews of a company to disk.
+
+        Args:
+            company_name: Trustpilot company domain
+            reviews: Review dictionaries, possibly empty (the company is still recorded)
+            position: Index of the batch in the export order, None to export it after the
+                stored ones; 0 puts reviews newer than the stored ones in front of them
+        """
+        entry = self._entry(company_name)
+
+        data = b"".join((json.dumps(review, ensure_ascii=False) + "\n").encode('utf-8') for review in reviews)
+        with open(self._company_path(company_name), 'ab') as f:
+            # Drop whatever an interrupted append wrote past the committed size
+            f.truncate(entry["bytes"])
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if reviews:
+            segment = [entry["reviews"], len(reviews)]
+            if position is None:
+                entry["segments"].append(segment)
+            else:
+                entry["segments"].insert(position, segment)
+        entry["reviews"] += len(reviews)
+        entry["bytes"] += len(data)
+        entry["updated_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+        self._save_manifest()
+
+    def reviews(self, company_name):
+        """
+        Return a company's reviews, newest batches first (empty if it isn't stored)
+        """
+        entry = self.companies.get(company_name)
+        if not entry or not entry["reviews"]:
+            return []
+
+        with open(self._company_path(company_name), 'rb') as f:
+            lines = f.read(entry["bytes"]).splitlines()
+        return [json.loads(line) for first, count in entry["segments"] for line in lines[first:first + count]]
+
+    def export_json(self, filename=REVIEWS_JSON_PATH):
+        """
+        Write every company to a JSON file in the scraped_trust_pilot.json layout.
+
+        Args:
+            filename: Output filename
+
+        Returns:
+            Number of reviews written
+        """
+        data = [{"company": company_name, "reviews": self.reviews(company_name)} for company_name in self.companies]
+        save_json(filename, data)
+        return sum(len(company_data["reviews"]) for company_data in data)
+
+if __name__ == "__main__":
+    output_file = sys.argv[1] if len(sys.argv) > 1 else REVIEWS_JSON_PATH
+    store = ReviewStore()
+    review_count = store.export_json(output_file)
+    print(f"💾 Exported {review_count} reviews of {len(store)} companies to {output_file}")
@@ -1,224 +1,104 @@
 import requests
-from bs4 import BeautifulSoup
-import time
-import random
-import json
-import os
-from datetime import datetime
+from collections import Counter
+from http_cache import CachedSession
+from review_engine import (BURST, HEADERS, REQUESTS_PER_SECOND, TokenBucket, get_with_retries, page_url,
+                           scrape_companies)
+from review_parsing import known_review_keys, parse_review_page, print_field_hit_report, take_until_known
+from review_store import ReviewStore
 
-def scrape_trustpilot_reviews(company_name, max_pages=5):
+REVIEWS_FILE = 'Trust Pilot Scraping/scraped_trust_pilot.json'  # Exported from the review store after a run
+# Companies already in the review store get their newest reviews added instead of being skipped
+INCREMENTAL_UPDATES = True
+
+# Shared by every request so connections are reused and unchanged pages come back as 304s;
+# created on first use so importing this module (as spawned worker processes do) leaves no cache directory behind
+session = None
+
+def get_session():
     """
-    Scrape Trustpilot reviews for a given company and save to JSON file
+    Return the shared CachedSession, creating it on the first call
+    """
+    global session
+    if session is None:
+        session = CachedSession(HEADERS)
+    return session
+
+# Paces the pages of every company under the same request budget as the concurrent scraper
+rate_limit = TokenBucket(REQUESTS_PER_SECOND, BURST)
+
+def scrape_trustpilot_reviews(company_name, max_pages=5, incremental=INCREMENTAL_UPDATES, store=None):
+    """
+    Scrape Trustpilot reviews for a given company and save them to the review store
+
+    A company that is already stored is skipped, or with incremental set,
+    paged newest first until the first review saved earlier and only the
+    newer reviews are added. Run review_store.py (or main) to export
+    scraped_trust_pilot.json.
     """
     base_url = f"https://www.trustpilot.com/review/{company_name}"  
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    }
     
     print(f"🔍 Starting to scrape Trustpilot for: {company_name}")
     print(f"📋 Base URL: {base_url}")
     print("=" * 80)
     
-    # Check if company already exists in the file
-    filename = 'Trust Pilot Scraping/scraped_trust_pilot.json'
-    if check_company_exists(company_name, filename):
-        print(f"🚫 Company '{company_name}' already exists in {filename}")
-        print(f"⏭️ Skipping scraping for this company...")
-        return 0
+    # Check if company already exists in the store
+    if store is None:
+        store = ReviewStore()
+    known_keys = None
+    if company_name in store:
+        if not incremental:
+            print(f"🚫 Company '{company_name}' already exists in {store.directory}")
+            print(f"⏭️ Skipping scraping for this company...")
+            return 0
+        known_keys = known_review_keys(store.reviews(company_name))
+        print(f"🔄 Company '{company_name}' already exists in {store.directory}, fetching reviews newer than the saved ones")
     
     scraped_reviews = []
     total_reviews = 0
     seen_reviews = set()  # Track duplicates across all pages
+    field_hits = Counter()
     
     for page in range(1, max_pages + 1):
         # Fixed pagination URL format
-        if page == 1:
-            url = base_url
-        else:
-            url = f"{base_url}?page={page}"
+        url = page_url(company_name, page, newest_first=known_keys is not None)
         
         print(f"\n📄 Scraping page {page}: {url}")
         
         try:
-            response = requests.get(url, headers=headers)
-            print(f"🌐 Response status: {response.status_code}")
+            rate_limit.wait()
+            response = get_with_retries(get_session(), url)
+            print(f"🌐 Response status: {response.status_code}{' (not modified, from cache)' if response.from_cache else ''}")
             
             if response.status_code != 200:
                 print(f"❌ Failed to get page {page}: Status {response.status_code}")
                 continue
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Find all review containers - these contain all review data together
-            review_containers = soup.find_all('article', {'data-service-review-card-paper': True})
-            
-            if not review_containers:
-                # Try alternative selectors
-                review_containers = soup.find_all('div', {'data-service-review-card-paper': True})
+            page_reviews, container_count = parse_review_page(response.content, seen_reviews, field_hits=field_hits)
+            print(f"✅ Found {container_count} review containers on page {page}")
             
-            if not review_containers:
-                # Try more generic selectors
-                review_containers = soup.select('[data-service-review-card-paper]')
+            reached_known = False
+            if known_keys is not None:
+                page_reviews, reached_known = take_until_known(page_reviews, known_keys)
             
-            print(f"✅ Found {len(review_containers)} review containers on page {page}")
-            
-            page_review_count = 0
-            
-            for i, container in enumerate(review_containers):
-                print(f"\n--- Processing Review {i + 1} ---")
-                
-                # Extract reviewer name
-                reviewer = "Anonymous"
-                reviewer_selectors = [
-                    'span[data-consumer-name-typography="true"]',
-                    '.typography_heading-xxs__QKBS8.typography_appearance-default__AAY17',
-                    'span.typography_heading-xxs__QKBS8',
-                    '[data-consumer-name-typography] span',
-                    'span[class*="consumer-name"]'
-                ]
-                
-                for selector in reviewer_selectors:
-                    reviewer_elem = container.select_one(selector)
-                    if reviewer_elem:
-                        reviewer = reviewer_elem.get_text(strip=True)
-                        print(f"👤 Reviewer: {reviewer}")
-                        break
-                
-                # Extract rating
-                rating = None
-                rating_selectors = [
-                    '[data-service-review-rating]',
-                    'img[alt*="star"]',
-                    '[class*="star-rating"]'
-                ]
-                
-                for selector in rating_selectors:
-                    rating_elem = container.select_one(selector)
-                    if rating_elem:
-                        if rating_elem.has_attr('data-service-review-rating'):
-                            rating = int(rating_elem['data-service-review-rating'])
-                        elif rating_elem.name == 'img' and 'alt' in rating_elem.attrs:
-                            alt_text = rating_elem['alt']
-                            import re
-                            rating_match = re.search(r'(\d)', alt_text)
-                            if rating_match:
-                                rating = int(rating_match.group(1))
-                        print(f"⭐ Rating: {rating}")
-                        break
-                
-                # Extract title
-                title = ""
-                title_selectors = [
-                    'h2[data-service-review-title-typography="true"]',
-                    '[data-service-review-title-typography]',
-                    'h2',
-                    'h3'
-                ]
-                
-                for selector in title_selectors:
-                    title_elem = container.select_one(selector)
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        if len(title) > 5:  # Only use meaningful titles
-                            print(f"📝 Title: {title}")
-                            break
-                        else:
-                            title = ""
-                
-                # Extract review text
-                text = ""
-                text_selectors = [
-                    'p[data-service-review-text-typography="true"]',
-                    '[data-service-review-text-typography]',
-                    '.styles_reviewContent__0Q2Tg',
-                    'p[class*="review-text"]',
-                    'div[class*="review-content"] p'
-                ]
-                
-                for selector in text_selectors:
-                    text_elem = container.select_one(selector)
-                    if text_elem:
-                        text = text_elem.get_text(strip=True)
-                        if len(text) > 10:  # Only use meaningful text
-                            # Clean up "See more" endings
-                            if text.endswith('See more'):
-                                text = text[:-8].strip()
-                            elif text.endswith('...See more'):
-                                text = text[:-11].strip()
-                            print(f"💬 Text ({len(text)} chars): {text[:100]}...")
-                            break
-                
-                # Extract date
-                date = ""
-                date_selectors = [
-                    'time[datetime]',
-                    '[datetime]',
-                    '.styles_reviewHeader__iU9Px time',
-                    'time'
-                ]
-                
-                for selector in date_selectors:
-                    date_elem = container.select_one(selector)
-                    if date_elem:
-                        if date_elem.has_attr('datetime'):
-                            try:
-                                # Parse ISO datetime and format it
-                                date_obj = datetime.fromisoformat(date_elem['datetime'].replace('Z', '+00:00'))
-                                date = date_obj.strftime('%Y-%m-%d')
-                            except:
-                                date = date_elem['datetime']
-                        else:
-                            date = date_elem.get_text(strip=True)
-                        print(f"📅 Date: {date}")
-                        break
-                
-                # Create unique identifier to avoid duplicates
-                review_signature = f"{reviewer}_{rating}_{date}_{text[:50]}"
-                
-                if review_signature in seen_reviews:
-                    print(f"⚠️ Duplicate review detected, skipping...")
-                    continue
-                
-                seen_reviews.add(review_signature)
-                
-                # Create review data structure
-                review_data = {
-                    "reviewer": reviewer,
-                    "rating": rating,
-                    "title": title,
-                    "text": text,
-                    "date": date
-                }
-
-                if not title.strip() and not text.strip():
-                    print(f"⚠️ Skipping review with empty title and text")
-                    continue
-                
+            for review_data in page_reviews:
                 scraped_reviews.append(review_data)
-                page_review_count += 1
                 total_reviews += 1
-                
                 print(f"✅ Successfully extracted review #{total_reviews}")
             
+            page_review_count = len(page_reviews)
+            
             print(f"\n📊 Page {page} summary: {page_review_count} new reviews extracted")
             print(f"🎯 Total reviews so far: {total_reviews}")
             
+            if reached_known:
+                print(f"🔚 Reached reviews saved earlier on page {page}, stopping...")
+                break
+            
             # Break if no reviews found (reached end)
             if page_review_count == 0:
                 print(f"🔚 No new reviews found on page {page}, stopping...")
                 break
             
-            # Add delay between pages
-            if page < max_pages:
-                delay = random.uniform(2, 4)
-                print(f"⏳ Waiting {delay:.1f} seconds before next page...")
-                time.sleep(delay)
-            
         except requests.RequestException as e:
             print(f"❌ Error scraping page {page}: {e}")
             break
@@ -228,92 +108,14 @@ def scrape_trustpilot_reviews(company_name, max_pages=5):
             traceback.print_exc()
             break
     
-    # Save to JSON file with company structure
-    save_company_reviews(company_name, scraped_reviews, 'Trust Pilot Scraping/scraped_trust_pilot.json')
+    # Save to the company's file in the review store
+    store.append(company_name, scraped_reviews, position=0 if known_keys is not None else None)
     
     print(f"\n🎯 Scraping completed! Total reviews processed: {total_reviews}")
-    print(f"💾 Reviews saved to scraped_trust_pilot.json")
+    print_field_hit_report(field_hits)
+    print(f"💾 Reviews saved to {store.directory} ({store.review_count(company_name)} for {company_name})")
     return total_reviews
 
-def check_company_exists(company_name, filename):
-    """
-    Check if a company already exists in the JSON file
-    """
-    if not os.path.exists(filename):
-        return False
-    
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        # Check if data is a list of company objects
-        if isinstance(data, list):
-            for company_data in data:
-                if company_data.get('company') == company_name:
-                    return True
-        
-        return False
-    except (json.JSONDecodeError, FileNotFoundError):
-        return False
-
-def save_company_reviews(company_name, reviews, filename):
-    """
-    Save reviews to JSON file with company structure
-    """
-    existing_data = []
-    
-    # Try to load existing data
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-            print(f"📁 Found existing file with {len(existing_data)} companies")
-        except (json.JSONDecodeError, FileNotFoundError):
-            print(f"📁 Creating new file {filename}")
-            existing_data = []
-    
-    # Create new company data structure
-    new_company_data = {
-        "company": company_name,
-        "reviews": reviews
-    }
-    
-    # Append new company data
-    existing_data.append(new_company_data)
-    
-    # Save to file
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(existing_data, f, indent=2, ensure_ascii=False)
-    
-    print(f"💾 Saved {len(reviews)} reviews for {company_name}")
-    print(f"📊 Total companies in file: {len(existing_data)}")
-
-def save_to_json(reviews, filename):
-    """
-    Save reviews to JSON file, appending to existing data if file exists
-    """
-    existing_reviews = []
-    
-    # Try to load existing data
-    if os.path.exists(filename):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                existing_reviews = json.load(f)
-            print(f"📁 Found existing file with {len(existing_reviews)} reviews")
-        except (json.JSONDecodeError, FileNotFoundError):
-            print(f"📁 Creating new file {filename}")
-            existing_reviews = []
-    
-    # Append new reviews
-    all_reviews = existing_reviews + reviews
-    
-    # Save to file
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(all_reviews, f, indent=2, ensure_ascii=False)
-    
-    print(f"💾 Saved {len(all_reviews)} total reviews to {filename}")
-    print(f"➕ Added {len(reviews)} new reviews")
-
 def main():
     # List of companies to scrape
     companies = [
@@ -332,27 +134,62 @@ def main():
     print("🚀 Trustpilot Multi-Company Scraper")
     print("=" * 50)
     
-    total_companies_scraped = 0
-    
+    store = ReviewStore()
+    companies_to_scrape = []
+    known_reviews = {}  # Companies updated incrementally -> keys of their saved reviews
     for company in companies:
-        print(f"\n🏢 Processing company: {company}")
-        print("-" * 40)
-        
-        reviews_count = scrape_trustpilot_reviews(company, max_pages=5)
-        
+        if company not in store:
+            companies_to_scrape.append(company)
+        elif INCREMENTAL_UPDATES:
+            known_reviews[company] = known_review_keys(store.reviews(company))
+            companies_to_scrape.append(company)
+        else:
+            print(f"⏭️ Skipped {company} (already exists in {store.directory})")
+    
+    print(f"\n🏢 Scraping {len(companies_to_scrape)} companies concurrently "
+          f"({len(known_reviews)} updated with their newest reviews only)")
+    print("-" * 40)
+    
+    # Until finish_company runs, a crash rolls a company back to what it held before this run
+    for company in companies_to_scrape:
+        store.begin(company)
+    
+    # Incremental pages arrive newest first, so each one goes right after the previous page's batch
+    positions = {company: 0 for company in known_reviews}
+    
+    def save_page(company, page, reviews):
+        store.append(company, reviews, position=positions.get(company))
+        if company in positions:
+            positions[company] += 1
+        print(f"💾 Saved {len(reviews)} reviews of {company} page {page} ({store.review_count(company)} stored)")
+    
+    def finish_company(company, reviews):
+        store.finish(company)
+        print(f"🏁 Finished {company}: {len(reviews)} new reviews ({store.review_count(company)} stored)")
+    
+    # Pages are saved as they are merged; finish_company then marks the company complete
+    review_counts = scrape_companies(
+        companies_to_scrape,
+        max_pages=5,
+        on_company_done=finish_company,
+        on_page_reviews=save_page,
+        known_reviews=known_reviews
+    )
+    
+    total_companies_scraped = 0
+    for company, reviews_count in review_counts.items():
         if reviews_count > 0:
             total_companies_scraped += 1
-            print(f"✅ Successfully scraped {reviews_count} reviews for {company}")
+            print(f"✅ Successfully scraped {reviews_count} {'new ' if company in known_reviews else ''}reviews for {company}")
         else:
-            print(f"⏭️ Skipped {company} (already exists or no reviews found)")
-        
-        # Add delay between companies
-        if company != companies[-1]:  # Not the last company
-            print(f"⏳ Waiting 1 seconds before next company...")
-            time.sleep(1)
+            print(f"⏭️ No {'new ' if company in known_reviews else ''}reviews found for {company}")
     
     print(f"\n🎯 Scraping completed for all companies!")
     print(f"📊 Total companies processed: {total_companies_scraped}/{len(companies)}")
+    
+    # review_counter.py and the notebook read the nested JSON layout
+    review_count = store.export_json(REVIEWS_FILE)
+    print(f"💾 Exported {review_count} reviews of {len(store)} companies to {REVIEWS_FILE}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file